@@ -0,0 +1,37 @@
+"""
+Benchmark recall@k and latency of the local vector store's IVF index against exact search
+"""
+import argparse
+import json
+
+import numpy as np
+
+from benchmark_quantization import clustered_vectors
+from services.vector_store import LocalVectorStore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = clustered_vectors(args.vectors + args.queries, args.dimension, args.clusters, rng)
+    store = LocalVectorStore(
+        args.dimension,
+        index_mode="ivf",
+        ivf_nlist=args.nlist,
+        # Train once on the whole set instead of at the default threshold
+        ivf_train_threshold=args.vectors
+    )
+    store.upsert([{"id": str(row), "values": values} for row, values in enumerate(data[:args.vectors])])
+    report = store.recall_report(data[args.vectors:], top_k=args.top_k, nprobe_values=args.nprobe)
+    store.close()
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,40 @@
+"""
+Benchmark memory, recall and latency of the local vector store's storage dtypes
+"""
+import argparse
+import json
+
+import numpy as np
+
+from services.vector_store import quantization_benchmark
+
+
+def clustered_vectors(count: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Synthetic embeddings grouped around random centroids, closer to real data than pure noise"""
+    centroids = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=count)
+    return centroids[assignments] + 0.5 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-multiplier", type=int, default=4)
+    parser.add_argument("--dtypes", nargs="+", default=["float16", "int8"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = clustered_vectors(args.vectors + args.queries, args.dimension, args.clusters, rng)
+    report = quantization_benchmark(
+        data[:args.vectors],
+        data[args.vectors:],
+        top_k=args.top_k,
+        storage_dtypes=args.dtypes,
+        rescore_multiplier=args.rescore_multiplier
+    )
+    print(json.dumps(report, indent=2))
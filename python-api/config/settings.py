@@ -18,16 +18,116 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4"
     openai_temperature: float = 0.3
     
+    # Vector Store Configuration ("pinecone" or "local")
+    vector_backend: str = "pinecone"
+    
+    # Local Vector Store ANN Index ("exact" or "ivf")
+    local_index_mode: str = "exact"
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 16
+    ivf_train_threshold: int = 10000
+    
+    # Local Vector Store Storage ("float32", "float16" or "int8"; rescoring reads a float32 copy
+    # from memory-mapped files under the rescore path, the system temp directory if unset)
+    local_storage_dtype: str = "float32"
+    local_rescore: bool = False
+    local_rescore_multiplier: int = 4
+    local_rescore_path: Optional[str] = None
+    
+    # Local Vector Store Sharding (more than one shard runs each in its own process; shard by "id" or "namespace")
+    local_shards: int = 1
+    local_shard_by: str = "id"
+    
+    # Local Index Snapshots (memory-mapped at startup, written on shutdown)
+    snapshot_path: Optional[str] = ".cache/snapshot"
+    
     # Pinecone Configuration
     pinecone_api_key: Optional[str] = None
     pinecone_environment: str = "us-east-1"
     pinecone_index_name: str = "tech-stack-knowledge"
     
+    # Incremental Indexing Manifest (used with the Pinecone backend; keep .cache
+    # on a persistent volume, since Pinecone outlives the container)
+    index_manifest_path: Optional[str] = ".cache/index_manifest.sqlite3"
+    
+    # Hybrid Search (BM25 keyword index used alongside the Pinecone backend)
+    lexical_index_path: Optional[str] = ".cache/lexical_index.sqlite3"
+    hybrid_candidate_multiplier: int = 3
+    rrf_k: int = 60
+    
+    # Batch Search
+    batch_search_max_queries: int = 50
+    
+    # Search Result Cache
+    search_cache_size: int = 1024
+    search_cache_ttl_seconds: float = 300.0
+    
+    # Technology Similarity Graph (persisted under the path with the Pinecone backend;
+    # the local backend keeps it in its snapshots)
+    tech_graph_k: int = 10
+    tech_graph_path: Optional[str] = ".cache/tech_graph"
+    
     # Vector Configuration
     embedding_dimension: int = 1536
     chunk_size: int = 1000
     chunk_overlap: int = 200
     
+    # Near-Duplicate Chunk Elimination (SimHash, across documents with the same metadata;
+    # distances up to 3 bits are always detected. A skipped chunk is only searchable
+    # through its canonical chunk, so parent_doc_id filters do not reach it)
+    dedup_enabled: bool = True
+    dedup_max_hamming_distance: int = 3
+    
+    # Ingest Preprocessing (requests up to the inline limit are chunked on a worker thread,
+    # larger ones in a process pool)
+    preprocess_workers: int = 0  # 0 means one per CPU core
+    preprocess_inline_max_chars: int = 200_000
+    preprocess_group_chars: int = 1_000_000
+    
+    # Embedding Batching
+    embedding_batch_size: int = 64
+    embedding_batch_max_tokens: int = 8000
+    embedding_max_concurrency: int = 4
+    
+    # Query Embedding Micro-Batching
+    query_batch_window_ms: float = 5.0
+    query_batch_max_size: int = 64
+    
+    # Streaming Bulk Ingest
+    bulk_ingest_batch_size: int = 50
+    bulk_ingest_max_line_bytes: int = 10_000_000
+    
+    # Background Ingest Jobs
+    ingest_jobs_path: Optional[str] = ".cache/ingest_jobs.sqlite3"
+    ingest_workers: int = 2
+    ingest_queue_size: int = 100
+    
+    # LLM Response Cache (set the path to empty to keep the cache in memory only)
+    response_cache_size: int = 1000
+    response_cache_ttl_seconds: float = 86400.0
+    response_cache_path: Optional[str] = ".cache/responses.sqlite3"
+    response_cache_disk_entries: int = 100_000
+    
+    # Semantic Response Cache (paraphrased requests reuse a cached answer above the similarity threshold;
+    # audit_rate is the share of semantic hits re-run through the LLM to measure agreement)
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 1000
+    semantic_cache_audit_rate: float = 0.0
+    
+    # Tiered Recommendations (when the LLM misses the budget a provisional rule-based stack is served
+    # and the LLM answer fills the cache in the background; 0 always waits for the LLM)
+    recommendation_latency_budget_ms: int = 0
+    
+    # Embedding Cache (set the path to empty to keep the cache in memory only)
+    embedding_cache_size: int = 10000
+    embedding_cache_path: Optional[str] = ".cache/embeddings.sqlite3"
+    
+    # Upsert Pipeline
+    upsert_batch_size: int = 100
+    upsert_max_workers: int = 4
+    upsert_queue_size: int = 8
+    
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
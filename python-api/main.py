@@ -2,8 +2,10 @@
 FastAPI application for AI-intensive operations using Langchain and Pinecone
 """
 import os
+import json
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -11,16 +13,23 @@ from dotenv import load_dotenv
 
 from services.ai_service import AIService
 from services.vector_service import VectorService
+from services.bulk_ingest import bulk_index
+from services.ingest_jobs import IngestJobManager, JobQueueFull, JobNotFound
+from config.settings import settings
 from models.requests import (
     StackRecommendationRequest,
     TechnologyAnalysisRequest,
     DocumentIndexRequest,
-    SearchRequest
+    SearchRequest,
+    BatchSearchRequest
 )
 from models.responses import (
     StackRecommendationResponse,
     TechnologyAnalysisResponse,
-    SearchResponse
+    SearchResponse,
+    BatchSearchResponse,
+    IndexDocumentsResponse,
+    IngestJobResponse
 )
 
 # Load environment variables
@@ -42,14 +51,31 @@ app.add_middleware(
 )
 
 # Initialize services
-ai_service = AIService()
 vector_service = VectorService()
+# The semantic response cache reuses the vector service's cached embeddings
+ai_service = AIService(embeddings=vector_service.embeddings)
+ingest_jobs = IngestJobManager(
+    vector_service,
+    path=settings.ingest_jobs_path or None,
+    workers=settings.ingest_workers,
+    queue_size=settings.ingest_queue_size,
+    batch_size=settings.bulk_ingest_batch_size
+)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
     await vector_service.initialize()
+    await ingest_jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and snapshot the local index on shutdown"""
+    await ingest_jobs.stop()
+    await vector_service.save_snapshot()
+    vector_service.close()
 
 
 @app.get("/health")
@@ -82,30 +108,185 @@ async def analyze_technology(request: TechnologyAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/ai/index-documents")
+def sse_stream(events):
+    """Format AI service events as server-sent events, ending with an error event on failure"""
+    async def body():
+        try:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/ai/recommend-stack/stream")
+async def recommend_stack_stream(request: StackRecommendationRequest):
+    """
+    Stream stack recommendations as server-sent events, one per category as it is generated
+    """
+    return sse_stream(ai_service.stream_stack_recommendations(request))
+
+
+@app.post("/api/ai/analyze-technology/stream")
+async def analyze_technology_stream(request: TechnologyAnalysisRequest):
+    """
+    Stream a technology analysis as server-sent events, one per field as it is generated
+    """
+    return sse_stream(ai_service.stream_technology_analysis(request))
+
+
+@app.post("/api/ai/index-documents", response_model=IndexDocumentsResponse)
 async def index_documents(request: DocumentIndexRequest):
     """
-    Index documents into Pinecone vector database
+    Incrementally index documents into the vector database
+    """
+    try:
+        result = await vector_service.index_documents(request.documents, namespace=request.namespace)
+        changed = result["added"] + result["updated"]
+        return IndexDocumentsResponse(
+            status="success",
+            dedup_ratio=result["duplicates"] / changed if changed else 0.0,
+            **result
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class IngestStreamingResponse(StreamingResponse):
+    """Streaming response that leaves the request body to the endpoint.
+
+    StreamingResponse normally consumes `receive` to watch for disconnects,
+    which would swallow the request body the ingest generator is still reading.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.post("/api/ai/index-documents/stream")
+async def index_documents_stream(request: Request, namespace: Optional[str] = None):
+    """
+    Ingest newline-delimited JSON documents as they arrive, streaming NDJSON progress back
+    """
+    if not vector_service.store:
+        raise HTTPException(status_code=500, detail="Vector store not initialized")
+    
+    async def progress():
+        try:
+            async for event in bulk_index(vector_service, request.stream(), namespace=namespace):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    
+    return IngestStreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@app.post("/api/ai/jobs/index-documents", response_model=IngestJobResponse, status_code=202)
+async def submit_index_job(request: DocumentIndexRequest):
+    """
+    Queue documents for background indexing and return the job immediately
     """
     try:
-        result = await vector_service.index_documents(request.documents)
-        return {"status": "success", "indexed_count": result}
+        return await ingest_jobs.submit(request.documents, namespace=request.namespace)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/ai/jobs", response_model=List[IngestJobResponse])
+async def list_index_jobs(limit: int = 50):
+    """
+    List recent background ingest jobs
+    """
+    return await ingest_jobs.list(limit=limit)
+
+
+@app.get("/api/ai/jobs/{job_id}", response_model=IngestJobResponse)
+async def get_index_job(job_id: str):
+    """
+    Get progress, throughput and errors for a background ingest job
+    """
+    try:
+        return await ingest_jobs.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+@app.delete("/api/ai/jobs/{job_id}", response_model=IngestJobResponse)
+async def cancel_index_job(job_id: str):
+    """
+    Cancel a queued or running background ingest job
+    """
+    try:
+        return await ingest_jobs.cancel(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
 @app.post("/api/ai/search", response_model=SearchResponse)
 async def semantic_search(request: SearchRequest):
     """
     Perform semantic search using Pinecone
     """
     try:
-        results = await vector_service.search(request.query, request.limit or 10)
+        results = await vector_service.search(
+            request.query,
+            request.limit or 10,
+            namespace=request.namespace,
+            filters=request.filters,
+            mode=request.mode or "vector"
+        )
         return SearchResponse(results=results)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/ai/search/batch", response_model=BatchSearchResponse)
+async def batch_search(request: BatchSearchRequest):
+    """
+    Run several searches with one batched embedding call, returning results in request order
+    """
+    if len(request.queries) > settings.batch_search_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_search_max_queries} queries per batch"
+        )
+    
+    try:
+        results = await vector_service.search_batch([query.model_dump() for query in request.queries])
+        return BatchSearchResponse(results=[SearchResponse(results=result) for result in results])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/ai/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss statistics for the AI API caches
+    """
+    return {**vector_service.cache_stats(), **ai_service.cache_stats()}
+
+
+@app.post("/api/ai/snapshot")
+async def save_snapshot():
+    """
+    Write a snapshot of the local vector index for fast restarts
+    """
+    try:
+        directory = await vector_service.save_snapshot()
+        return {"success": directory is not None, "snapshot": directory}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/ai/technologies")
 async def get_supported_technologies():
     """
@@ -1,7 +1,7 @@
 """
 Request models for the AI API
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +15,7 @@ class StackRecommendationRequest(BaseModel):
     timeline: Optional[str] = Field(None, description="Project timeline")
     preferred_languages: Optional[List[str]] = Field(None, description="Preferred programming languages")
     constraints: Optional[List[str]] = Field(None, description="Technical constraints")
+    latency_budget_ms: Optional[int] = Field(None, description="Serve a provisional rule-based answer if the LLM takes longer")
 
 
 class TechnologyAnalysisRequest(BaseModel):
@@ -35,4 +36,13 @@ class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
     limit: Optional[int] = Field(10, description="Number of results to return")
     namespace: Optional[str] = Field(None, description="Pinecone namespace to search")
-    filters: Optional[Dict[str, Any]] = Field(None, description="Search filters")
\ No newline at end of file
+    filters: Optional[Dict[str, Any]] = Field(None, description="Search filters")
+    mode: Optional[Literal["vector", "hybrid", "lexical"]] = Field(
+        "vector",
+        description="Retrieval mode: vector (cosine scores), hybrid (reciprocal rank fusion scores) or lexical"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for running several searches in one round trip"""
+    queries: List[SearchRequest] = Field(..., description="Searches to run, each with its own options")
\ No newline at end of file
@@ -26,6 +26,7 @@ class StackRecommendationResponse(BaseModel):
     estimated_learning_time: str
     estimated_development_time: str
     total_cost_estimate: Optional[str]
+    provisional: bool = False
 
 
 class TechnologyAnalysisResponse(BaseModel):
@@ -52,4 +53,42 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     """Response model for search results"""
     results: List[SearchResult]
-    total_count: int = Field(default_factory=lambda: 0)
\ No newline at end of file
+    total_count: int = Field(default_factory=lambda: 0)
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch search, one entry per query in request order"""
+    results: List[SearchResponse]
+
+
+class IndexDocumentsResponse(BaseModel):
+    """Response model for incremental document indexing"""
+    status: str
+    indexed_count: int
+    added: int
+    updated: int
+    unchanged: int
+    deleted: int
+    duplicates: int = 0
+    dedup_ratio: float = 0.0
+
+
+class IngestJobResponse(BaseModel):
+    """Response model for a background ingest job"""
+    job_id: str
+    status: str
+    namespace: Optional[str]
+    total_documents: int
+    processed_documents: int
+    total_batches: int
+    committed_batches: int
+    progress: float
+    documents_per_second: Optional[float]
+    elapsed_seconds: Optional[float]
+    error: Optional[str]
+    indexed_count: int
+    added: int
+    updated: int
+    unchanged: int
+    deleted: int
+    duplicates: int = 0
\ No newline at end of file
@@ -2,34 +2,218 @@
 AI Service using Langchain for technology stack recommendations
 """
 import os
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+import random
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Sequence, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_core.output_parsers import JsonOutputParser
 
+from config.settings import settings
 from models.requests import StackRecommendationRequest, TechnologyAnalysisRequest
 from models.responses import (
     StackRecommendationResponse, 
     TechnologyAnalysisResponse,
     TechnologyRecommendation
 )
+from services.response_cache import ResponseCache, canonical_stack_request, canonical_analysis_request
+from services.semantic_cache import SemanticCache
+from services.single_flight import SingleFlight
+from services.json_stream import JsonEventScanner
+from ai_module import ai_engine
+
+
+# Canonical request fields a semantic cache hit must match exactly. These are hard constraints
+# (a different language or project type needs a different stack); only the descriptive
+# fields left over, such as stack requirements and timeline, may be paraphrased.
+SEMANTIC_EXACT_FIELDS = {
+    "stack": ["project_type", "team_size", "experience_level", "budget", "preferred_languages", "constraints"],
+    "analysis": ["technology_name", "comparison_with"]
+}
+
+
+def semantic_text(kind: str, canonical: Dict[str, Any]) -> str:
+    """Text embedded for the semantic cache: the paraphrasable part of a canonical request"""
+    exact = SEMANTIC_EXACT_FIELDS[kind]
+    return "\n".join(
+        f"{field}: {', '.join(value) if isinstance(value, list) else value}"
+        for field, value in canonical.items()
+        if field not in exact and value not in (None, [])
+    )
+
+
+def response_agreement(kind: str, a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """How closely two responses to similar requests agree, from 0 to 1"""
+    if kind == "stack":
+        categories = set(a["recommended_stack"]) | set(b["recommended_stack"])
+        if not categories:
+            return 1.0
+        same = sum(
+            1 for category in categories
+            if category in a["recommended_stack"] and category in b["recommended_stack"]
+            and a["recommended_stack"][category]["name"].lower() == b["recommended_stack"][category]["name"].lower()
+        )
+        return same / len(categories)
+    same_name = a["technology_name"].lower() == b["technology_name"].lower()
+    close_score = abs(a["recommendation_score"] - b["recommendation_score"]) <= 0.1
+    return (same_name + close_score) / 2
 
 
 class AIService:
     """Service for AI-powered technology recommendations"""
     
-    def __init__(self):
+    def __init__(self, embeddings=None):
+        self.model = settings.openai_model
+        self.temperature = settings.openai_temperature
         self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.3,
+            model=self.model,
+            temperature=self.temperature,
             api_key=os.getenv("OPENAI_API_KEY")
         )
         self.json_parser = JsonOutputParser()
+        # Most traffic is a few dozen project archetypes; answer repeats without the LLM
+        self.response_cache = ResponseCache(
+            max_entries=settings.response_cache_size,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            path=settings.response_cache_path or None,
+            max_disk_entries=settings.response_cache_disk_entries
+        )
+        # Paraphrased requests are served from their nearest cached neighbour
+        self.embeddings = embeddings
+        self.semantic_cache = None
+        if embeddings is not None and settings.semantic_cache_enabled:
+            self.semantic_cache = SemanticCache(
+                threshold=settings.semantic_cache_threshold,
+                max_entries=settings.semantic_cache_size
+            )
+        # Identical requests arriving together share one lookup and LLM call
+        self._single_flight = SingleFlight()
+        self._background = set()
+        self.provisional_served = 0
+        self.llm_within_budget = 0
     
-    async def generate_stack_recommendations(self, request: StackRecommendationRequest) -> StackRecommendationResponse:
-        """Generate technology stack recommendations based on project requirements"""
+    def _cache_key(self, kind: str, canonical: Dict[str, Any], system_prompt: str) -> str:
+        """Response cache key; the model, temperature and prompt all change the answer"""
+        return self.response_cache.key(kind, {
+            **canonical,
+            "model": self.model,
+            "temperature": self.temperature,
+            "prompt": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        })
+    
+    async def _cached_response(self, kind: str, canonical: Dict[str, Any], system_prompt: str,
+                               compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Serve a response from the exact or semantic cache, or compute and cache it.
+        
+        Concurrent calls for the same canonical request are coalesced into one.
+        """
+        cache_key = self._cache_key(kind, canonical, system_prompt)
+        return await self._single_flight.do(
+            cache_key,
+            lambda: self._resolve_response(kind, canonical, system_prompt, cache_key, compute)
+        )
+    
+    async def _resolve_response(self, kind: str, canonical: Dict[str, Any], system_prompt: str, cache_key: str,
+                                compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+        if cached is not None:
+            return cached
+        
+        partition = vector = near_miss = None
+        text = semantic_text(kind, canonical) if self.semantic_cache is not None else ""
+        if text:
+            partition = self._cache_key(
+                kind, {field: canonical[field] for field in SEMANTIC_EXACT_FIELDS[kind]}, system_prompt
+            )
+            try:
+                vector = await self.embeddings.aembed_query(text)
+            except Exception as e:
+                print(f"Semantic cache lookup skipped: {e}")
         
+        if vector is not None:
+            match = self.semantic_cache.lookup(partition, vector)
+            if match is not None:
+                neighbour_key, similarity = match
+                neighbour = await asyncio.to_thread(self.response_cache.get, neighbour_key, False)
+                if neighbour is None:
+                    self.semantic_cache.discard(partition, neighbour_key)
+                elif similarity >= self.semantic_cache.threshold:
+                    if random.random() < settings.semantic_cache_audit_rate:
+                        self._spawn(self._audit(
+                            kind, similarity, neighbour, cache_key, partition, vector, compute
+                        ))
+                    return neighbour
+                else:
+                    near_miss = (similarity, neighbour)
+        
+        value = await compute()
+        await asyncio.to_thread(self.response_cache.put, cache_key, value)
+        if vector is not None:
+            self.semantic_cache.add(partition, vector, cache_key)
+            if near_miss is not None:
+                # The fresh answer shows how a lower threshold would have fared, at no extra cost
+                self.semantic_cache.record_audit(near_miss[0], response_agreement(kind, near_miss[1], value))
+        return value
+    
+    async def _audit(self, kind: str, similarity: float, served: Dict[str, Any], cache_key: str,
+                     partition: str, vector: List[float], compute: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Compute the fresh answer behind a semantic hit to measure its agreement"""
+        try:
+            value = await compute()
+        except Exception as e:
+            print(f"Semantic cache audit failed: {e}")
+            return
+        self.semantic_cache.record_audit(similarity, response_agreement(kind, served, value))
+        await asyncio.to_thread(self.response_cache.put, cache_key, value)
+        self.semantic_cache.add(partition, vector, cache_key)
+    
+    def _spawn(self, coroutine):
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+    
+    async def _stream_completion(self, messages: List[Any], paths: Sequence[Sequence[Any]],
+                                 on_value: Callable[[Tuple[Any, ...], Any], None]) -> Dict[str, Any]:
+        """Stream a JSON completion, passing each value at `paths` to on_value as soon as it is complete"""
+        scanner = JsonEventScanner(paths)
+        parts = []
+        async for chunk in self.llm.astream(messages):
+            parts.append(chunk.content)
+            for path, value in scanner.feed(chunk.content):
+                on_value(path, value)
+        return self.json_parser.parse("".join(parts))
+    
+    async def _stream_response(self, kind: str, canonical: Dict[str, Any], system_prompt: str, messages: List[Any],
+                               paths: Sequence[Sequence[Any]], convert: Callable[[Dict[str, Any]], Dict[str, Any]]
+                               ) -> AsyncIterator[Tuple[Optional[Tuple[Any, ...]], Any]]:
+        """Yield (path, value) for partial values as the LLM produces them, then (None, full response).
+        
+        The request still goes through the caches and single-flight; when it is
+        answered from a cache or by another caller's execution, only the full
+        response is yielded.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def compute() -> Dict[str, Any]:
+            parsed = await self._stream_completion(messages, paths, lambda path, value: queue.put_nowait((path, value)))
+            return convert(parsed)
+        
+        task = asyncio.ensure_future(self._cached_response(kind, canonical, system_prompt, compute))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            yield None, await task
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    def _stack_messages(self, request: StackRecommendationRequest) -> Tuple[str, List[Any]]:
+        """System prompt and messages for a stack recommendation request"""
         system_prompt = """You are an expert technology consultant with deep knowledge of modern development stacks.
         Analyze the project requirements and provide detailed technology recommendations.
         
@@ -86,10 +270,10 @@ class AIService:
             SystemMessage(content=system_prompt),
             HumanMessage(content=human_prompt)
         ]
-        
-        response = await self.llm.ainvoke(messages)
-        parsed_response = self.json_parser.parse(response.content)
-        
+        return system_prompt, messages
+    
+    def _stack_result(self, parsed_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a parsed stack recommendation into a cacheable response dict"""
         # Convert to Pydantic models
         recommended_stack = {}
         for category, tech_data in parsed_response["recommended_stack"].items():
@@ -110,11 +294,92 @@ class AIService:
             estimated_learning_time=parsed_response["estimated_learning_time"],
             estimated_development_time=parsed_response["estimated_development_time"],
             total_cost_estimate=parsed_response.get("total_cost_estimate")
+        ).model_dump()
+    
+    def _rule_based_stack(self, request: StackRecommendationRequest) -> StackRecommendationResponse:
+        """Instant answer from the rule-based engine, flagged as provisional"""
+        result = ai_engine.recommend_stack(
+            project_type=request.project_type.lower(),
+            requirements=request.requirements,
+            team_size=request.team_size or 3,
+            experience_level=request.experience_level or "intermediate"
+        )
+        return StackRecommendationResponse(
+            recommended_stack={
+                category: TechnologyRecommendation(**tech_data)
+                for category, tech_data in result["recommended_stack"].items()
+            },
+            overall_score=result["overall_score"],
+            reasoning=result["reasoning"],
+            # The engine only names alternative stacks, without per-technology details
+            alternatives=[],
+            estimated_learning_time=result["estimated_learning_time"],
+            estimated_development_time=result["estimated_development_time"],
+            total_cost_estimate=None,
+            provisional=True
         )
     
-    async def analyze_technology(self, request: TechnologyAnalysisRequest) -> TechnologyAnalysisResponse:
-        """Analyze a specific technology and provide detailed insights"""
+    def _report_background_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background recommendation failed: {task.exception()}")
+    
+    async def generate_stack_recommendations(self, request: StackRecommendationRequest) -> StackRecommendationResponse:
+        """Generate technology stack recommendations based on project requirements.
+        
+        With a latency budget (from the request or settings), a provisional
+        rule-based answer is returned when the LLM does not answer in time; the
+        LLM request keeps running and caches its answer for the next caller.
+        """
+        system_prompt, messages = self._stack_messages(request)
         
+        async def compute() -> Dict[str, Any]:
+            response = await self.llm.ainvoke(messages)
+            return self._stack_result(self.json_parser.parse(response.content))
+        
+        budget_ms = request.latency_budget_ms
+        if budget_ms is None:
+            budget_ms = settings.recommendation_latency_budget_ms
+        response = self._cached_response("stack", canonical_stack_request(request), system_prompt, compute)
+        if budget_ms <= 0:
+            return StackRecommendationResponse.model_validate(await response)
+        
+        task = self._spawn(response)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), budget_ms / 1000)
+        except asyncio.TimeoutError:
+            task.add_done_callback(self._report_background_failure)
+            self.provisional_served += 1
+            return self._rule_based_stack(request)
+        self.llm_within_budget += 1
+        return StackRecommendationResponse.model_validate(result)
+    
+    async def stream_stack_recommendations(self, request: StackRecommendationRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a "recommendation" event per category as soon as the LLM completes it, then a "result" event"""
+        system_prompt, messages = self._stack_messages(request)
+        sent = set()
+        
+        async for path, value in self._stream_response(
+            "stack", canonical_stack_request(request), system_prompt, messages,
+            [("recommended_stack", "*")], self._stack_result
+        ):
+            if path is not None:
+                try:
+                    recommendation = TechnologyRecommendation(**value).model_dump()
+                except Exception:
+                    # Left for the final validation to report
+                    continue
+                sent.add(path[1])
+                yield {"event": "recommendation", "data": {"category": path[1], "recommendation": recommendation}}
+                continue
+            
+            # Served from a cache or another caller's request: send what was not streamed
+            for category, recommendation in value["recommended_stack"].items():
+                if category not in sent:
+                    yield {"event": "recommendation", "data": {"category": category, "recommendation": recommendation}}
+            yield {"event": "result", "data": value}
+    
+    def _analysis_messages(self, request: TechnologyAnalysisRequest) -> Tuple[str, List[Any]]:
+        """System prompt and messages for a technology analysis request"""
         system_prompt = """You are a technology expert providing detailed analysis of software technologies.
         Provide comprehensive insights including pros, cons, use cases, learning resources, and market trends.
         
@@ -149,11 +414,41 @@ class AIService:
             SystemMessage(content=system_prompt),
             HumanMessage(content=human_prompt)
         ]
+        return system_prompt, messages
+    
+    def _analysis_result(self, parsed_response: Dict[str, Any]) -> Dict[str, Any]:
+        return TechnologyAnalysisResponse(**parsed_response).model_dump()
+    
+    async def analyze_technology(self, request: TechnologyAnalysisRequest) -> TechnologyAnalysisResponse:
+        """Analyze a specific technology and provide detailed insights"""
+        system_prompt, messages = self._analysis_messages(request)
         
-        response = await self.llm.ainvoke(messages)
-        parsed_response = self.json_parser.parse(response.content)
+        async def compute() -> Dict[str, Any]:
+            response = await self.llm.ainvoke(messages)
+            return self._analysis_result(self.json_parser.parse(response.content))
         
-        return TechnologyAnalysisResponse(**parsed_response)
+        result = await self._cached_response("analysis", canonical_analysis_request(request), system_prompt, compute)
+        return TechnologyAnalysisResponse.model_validate(result)
+    
+    async def stream_technology_analysis(self, request: TechnologyAnalysisRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a "field" event per top-level analysis field as soon as it is complete, then a "result" event"""
+        system_prompt, messages = self._analysis_messages(request)
+        sent = set()
+        
+        async for path, value in self._stream_response(
+            "analysis", canonical_analysis_request(request), system_prompt, messages,
+            [("*",)], self._analysis_result
+        ):
+            if path is not None:
+                if path[0] in TechnologyAnalysisResponse.model_fields:
+                    sent.add(path[0])
+                    yield {"event": "field", "data": {"name": path[0], "value": value}}
+                continue
+            
+            for name, field_value in value.items():
+                if name not in sent:
+                    yield {"event": "field", "data": {"name": name, "value": field_value}}
+            yield {"event": "result", "data": value}
     
     async def generate_compatibility_matrix(self, technologies: List[str]) -> Dict[str, Any]:
         """Generate compatibility matrix for multiple technologies"""
@@ -171,4 +466,16 @@ class AIService:
         ]
         
         response = await self.llm.ainvoke(messages)
-        return self.json_parser.parse(response.content)
\ No newline at end of file
+        return self.json_parser.parse(response.content)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for the LLM response caches"""
+        return {
+            "responses": self.response_cache.stats(),
+            "semantic_responses": self.semantic_cache.stats() if self.semantic_cache else None,
+            "single_flight": self._single_flight.stats(),
+            "tiered": {
+                "llm_within_budget": self.llm_within_budget,
+                "provisional_served": self.provisional_served
+            }
+        }
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index for the local vector store
+"""
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+
+class IVFIndex:
+    """Inverted-file index over L2-normalized rows of a namespace matrix.
+
+    Rows are clustered around `nlist` centroids with spherical k-means; a
+    query only scores the rows in its `nprobe` closest lists, so search cost
+    grows with nprobe * (n / nlist) instead of n. Larger nprobe trades
+    latency for recall.
+    """
+
+    def __init__(self, nlist: int = 256, nprobe: int = 16, train_threshold: int = 10000,
+                 iterations: int = 10, sample_per_list: int = 64, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.iterations = iterations
+        self.sample_per_list = sample_per_list
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        self.assignments: List[int] = []
+        self.trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def needs_training(self, size: int) -> bool:
+        """Train once the namespace is big enough, and retrain after it doubles"""
+        if not self.trained:
+            return size >= self.train_threshold
+        return size >= 2 * self.trained_size
+
+    def train(self, matrix: np.ndarray):
+        """Cluster the given rows and rebuild every inverted list"""
+        size = matrix.shape[0]
+        if size == 0:
+            return
+
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist, size)
+        sample_size = min(size, nlist * self.sample_per_list)
+        sample = matrix[np.sort(rng.choice(size, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for lists that ended up empty
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self.trained_size = size
+
+        labels = self._assign(matrix)
+        self.lists = [[] for _ in range(nlist)]
+        for row, label in enumerate(labels.tolist()):
+            self.lists[label].append(row)
+        self.assignments = labels.tolist()
+
+    def _assign(self, vectors: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        """Nearest centroid for each vector, computed in batches to bound memory"""
+        labels = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], batch_size):
+            block = vectors[start:start + batch_size]
+            labels[start:start + batch_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def add(self, rows: List[int], vectors: np.ndarray):
+        """Assign new or updated rows to their closest list"""
+        if not self.trained or not rows:
+            return
+
+        labels = self._assign(vectors).tolist()
+        for row, label in zip(rows, labels):
+            if row < len(self.assignments):
+                self.remove(row)
+            else:
+                self.assignments.extend([-1] * (row + 1 - len(self.assignments)))
+            self.assignments[row] = label
+            self.lists[label].append(row)
+
+    def remove(self, row: int):
+        """Drop a row from its list"""
+        if not self.trained or row >= len(self.assignments):
+            return
+        label = self.assignments[row]
+        if label >= 0:
+            self.lists[label].remove(row)
+            self.assignments[row] = -1
+
+    def move(self, source: int, target: int):
+        """Record that the row at `source` now lives at `target`"""
+        if not self.trained or source >= len(self.assignments):
+            return
+        label = self.assignments[source]
+        if label < 0:
+            return
+        members = self.lists[label]
+        members[members.index(source)] = target
+        self.assignments[target] = label
+        self.assignments[source] = -1
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows stored in the lists whose centroids are closest to the query"""
+        nprobe = min(nprobe or self.nprobe, len(self.lists))
+        centroid_scores = self.centroids @ query
+        if nprobe < len(self.lists):
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(len(self.lists))
+        rows = [self.lists[probe] for probe in probes.tolist() if self.lists[probe]]
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.asarray(members, dtype=np.int64) for members in rows])
+
+    def save(self, directory: str):
+        """Write the trained state to a snapshot directory"""
+        if not self.trained:
+            return
+        np.save(os.path.join(directory, "ivf_centroids.npy"), self.centroids)
+        np.save(os.path.join(directory, "ivf_assignments.npy"), np.asarray(self.assignments, dtype=np.int64))
+        with open(os.path.join(directory, "ivf.json"), "w") as handle:
+            json.dump({"trained_size": self.trained_size}, handle)
+
+    def load(self, directory: str):
+        """Restore the state written by save(), if the snapshot has one"""
+        if not os.path.exists(os.path.join(directory, "ivf.json")):
+            return
+        with open(os.path.join(directory, "ivf.json")) as handle:
+            self.trained_size = json.load(handle)["trained_size"]
+        self.centroids = np.load(os.path.join(directory, "ivf_centroids.npy"))
+        assignments = np.load(os.path.join(directory, "ivf_assignments.npy"))
+        self.assignments = assignments.tolist()
+
+        # Rebuild the lists with one sort instead of a Python loop over rows
+        assigned = np.flatnonzero(assignments >= 0)
+        order = assigned[np.argsort(assignments[assigned], kind="stable")]
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self.centroids))]
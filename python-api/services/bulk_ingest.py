@@ -0,0 +1,125 @@
+"""
+Streaming bulk ingest of newline-delimited JSON documents
+"""
+import asyncio
+import json
+from typing import AsyncIterator, List, Dict, Any, Optional
+
+from config.settings import settings
+from services.index_manifest import with_document_id
+
+
+class NDJSONError(Exception):
+    """A line of the ingest stream could not be parsed as a document"""
+
+    def __init__(self, line_number: int, detail: str):
+        super().__init__(detail)
+        self.line_number = line_number
+        self.detail = detail
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Any]:
+    """Parse JSON values from an NDJSON byte stream as the bytes arrive.
+
+    Yields an NDJSONError in place of any line that is not valid JSON or is
+    longer than max_line_bytes; parsing continues with the next line.
+    """
+    buffer = b""
+    line_number = 0
+    skipping = False
+
+    async for chunk in stream:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_number += 1
+            if skipping:
+                # Tail of an oversized line that was already reported
+                skipping = False
+                continue
+            if line.strip():
+                yield _parse_line(line, line_number)
+
+        if len(buffer) > max_line_bytes and not skipping:
+            line_number += 1
+            yield NDJSONError(line_number, f"Line exceeds {max_line_bytes} bytes")
+            skipping = True
+        if skipping:
+            buffer = b""
+
+    if buffer.strip() and not skipping:
+        yield _parse_line(buffer, line_number + 1)
+
+
+def _parse_line(line: bytes, line_number: int) -> Any:
+    try:
+        document = json.loads(line)
+    except ValueError as e:
+        return NDJSONError(line_number, f"Invalid JSON: {e}")
+    if not isinstance(document, dict):
+        return NDJSONError(line_number, "Each line must be a JSON object")
+    return document
+
+
+async def bulk_index(vector_service, stream: AsyncIterator[bytes], namespace: Optional[str] = None,
+                     batch_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Index an NDJSON document stream in bounded batches, yielding progress events.
+
+    Parsing runs ahead of indexing by at most a couple of batches, so reading
+    from the client pauses whenever the embedding/upsert pipeline falls behind.
+    """
+    batch_size = batch_size or settings.bulk_ingest_batch_size
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    errors: List[Dict[str, Any]] = []
+
+    async def read():
+        batch = []
+        async for item in iter_ndjson(stream, settings.bulk_ingest_max_line_bytes):
+            if isinstance(item, NDJSONError):
+                errors.append({"event": "error", "line": item.line_number, "detail": item.detail})
+                continue
+            # Ids must be stable across batches, each of which is a separate index_documents call
+            batch.append(with_document_id(item))
+            if len(batch) >= batch_size:
+                await queue.put(batch)
+                batch = []
+        if batch:
+            await queue.put(batch)
+        await queue.put(None)
+
+    reader = asyncio.create_task(read())
+    totals = {"documents": 0, "indexed_count": 0, "added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "duplicates": 0}
+
+    try:
+        while True:
+            if reader.done():
+                # Raises if the reader failed; otherwise everything is already queued
+                reader.result()
+                batch = await queue.get()
+            else:
+                get = asyncio.create_task(queue.get())
+                await asyncio.wait({get, reader}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    continue
+                batch = get.result()
+
+            while errors:
+                yield errors.pop(0)
+            if batch is None:
+                break
+
+            result = await vector_service.index_documents(batch, namespace=namespace)
+            totals["documents"] += len(batch)
+            for key, value in result.items():
+                totals[key] += value
+            yield {"event": "progress", **totals}
+
+        yield {"event": "done", **totals}
+    finally:
+        if not reader.done():
+            reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
@@ -0,0 +1,90 @@
+"""
+SimHash fingerprints for near-duplicate chunk detection
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_BITS = np.arange(64, dtype=np.uint64)
+
+# Fingerprints are split into this many 16-bit bands for candidate lookup.
+# Two fingerprints within BANDS - 1 bits of each other share at least one
+# band, so distances up to 3 are always found.
+BANDS = 4
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits"""
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0
+    shingles = [
+        " ".join(words[i:i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    ]
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+         for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # A bit is set when most shingle hashes have it set
+    votes = ((hashes[:, None] >> _BITS) & np.uint64(1)).sum(axis=0) * 2 > len(shingles)
+    return sum(1 << int(bit) for bit in np.flatnonzero(votes))
+
+
+def dedup_scope(metadata: Dict[str, Any]) -> str:
+    """Chunks can only stand in for each other within the same scope.
+
+    A skipped chunk is never stored, so filtered searches only reach it
+    through its canonical chunk. The scope is the document's metadata, so
+    metadata filters match both alike; the canonical chunk keeps its own
+    parent_doc_id, so a parent_doc_id filter cannot reach skipped chunks
+    of other documents.
+    """
+    payload = json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (16 * band)) & 0xFFFF for band in range(BANDS)]
+
+
+def to_signed(fingerprint: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto SQLite's signed INTEGER range"""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class SimHashIndex:
+    """In-memory banded index of fingerprints, used for chunks of the request being indexed"""
+
+    def __init__(self):
+        self._bands: Dict[Tuple[str, int, int], List[Tuple[str, int]]] = {}
+
+    def add(self, key: str, fingerprint: int, scope: str = ""):
+        for band, value in enumerate(bands(fingerprint)):
+            self._bands.setdefault((scope, band, value), []).append((key, fingerprint))
+
+    def nearest(self, fingerprint: int, max_distance: int, scope: str = "") -> Optional[str]:
+        """Key of the closest fingerprint in the same scope within max_distance bits"""
+        best = None
+        best_distance = max_distance + 1
+        for band, value in enumerate(bands(fingerprint)):
+            for key, other in self._bands.get((scope, band, value), ()):
+                distance = hamming(fingerprint, other)
+                if distance < best_distance:
+                    best, best_distance = key, distance
+        return best
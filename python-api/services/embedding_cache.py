@@ -0,0 +1,153 @@
+"""
+Content-addressed embedding cache with an in-memory LRU tier and a SQLite tier
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC unicode with collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """Two-tier cache mapping (model, normalized text) to an embedding vector"""
+
+    def __init__(self, model: str, max_entries: int = 10000, path: Optional[str] = None):
+        self.model = model
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def key(self, text: str) -> str:
+        """Content address of a text for this cache's model"""
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up texts, checking memory first and then disk"""
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[position] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(position)
+
+            if missing and self._db is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    list(missing)
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    vector = vector.tolist()
+                    self._remember(key, vector)
+                    for position in missing.pop(key):
+                        results[position] = vector
+                        self.hits += 1
+                        self.disk_hits += 1
+
+            self.misses += sum(len(positions) for positions in missing.values())
+
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings in both tiers"""
+        entries = {self.key(text): vector for text, vector in zip(texts, vectors)}
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in entries.items()]
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "persistent": self._db is not None
+            }
+
+
+class CachedEmbeddings:
+    """Wraps a LangChain embeddings object so cached texts skip the provider call"""
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite lookups are blocking, so keep them off the event loop
+        results = await asyncio.to_thread(self.cache.get_many, texts)
+
+        # Embed each distinct missing text once, even if it repeats in the batch
+        pending: Dict[str, List[int]] = {}
+        for position, vector in enumerate(results):
+            if vector is None:
+                pending.setdefault(self.cache.key(texts[position]), []).append(position)
+
+        if pending:
+            to_embed = [texts[positions[0]] for positions in pending.values()]
+            vectors = await self.embeddings.aembed_documents(to_embed)
+            for positions, vector in zip(pending.values(), vectors):
+                for position in positions:
+                    results[position] = vector
+            await asyncio.to_thread(self.cache.put_many, to_embed, vectors)
+
+        return results
+
+    async def aembed_query(self, text: str) -> List[float]:
+        cached = (await asyncio.to_thread(self.cache.get_many, [text]))[0]
+        if cached is not None:
+            return cached
+
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self.cache.put_many, [text], [vector])
+        return vector
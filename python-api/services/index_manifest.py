@@ -0,0 +1,216 @@
+"""
+Manifest of indexed chunk hashes used for incremental re-indexing
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.dedup import BANDS, bands, hamming, to_signed, to_unsigned
+from services.snapshot import save_database, open_database, copy_to_memory
+
+
+def chunk_hash(content: str, metadata: Dict[str, Any]) -> str:
+    """Hash of everything that ends up in a chunk's vector record"""
+    payload = json.dumps({"content": content, "metadata": metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def with_document_id(document: Dict[str, Any]) -> Dict[str, Any]:
+    """The document, given an id derived from its content and metadata if it has none.
+
+    index_documents names id-less documents by position within one call, so
+    callers that split a document set across calls assign ids up front.
+    """
+    if document.get("id") is not None:
+        return document
+    digest = chunk_hash(document.get("content", ""), document.get("metadata", {}))
+    return {**document, "id": f"doc_{digest[:32]}"}
+
+
+_FINGERPRINT_COLUMNS = ["simhash INTEGER", "duplicate_of TEXT", "dedup_scope TEXT"] + [
+    f"band{band} INTEGER" for band in range(BANDS)
+]
+
+
+class IndexManifest:
+    """Tracks which chunk ids (and their hashes) each parent document owns per namespace.
+
+    Chunks also carry a SimHash fingerprint split into indexed bands, and
+    chunks skipped as near-duplicates record the chunk that represents them.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path and path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        # Set while serving a snapshot file, which is copied on the first write
+        self._read_only = False
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS chunks (
+                    namespace TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    PRIMARY KEY (namespace, doc_id, chunk_id)
+                )"""
+            )
+            self._migrate()
+
+    def _make_writable(self):
+        if self._read_only:
+            self._db = copy_to_memory(self._db)
+            self._read_only = False
+
+    def _migrate(self):
+        """Add the fingerprint columns to manifests written before they existed"""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(chunks)")}
+        for column in _FINGERPRINT_COLUMNS:
+            if column.split()[0] not in columns:
+                self._db.execute(f"ALTER TABLE chunks ADD COLUMN {column}")
+        if "duplicate_of" in columns and "dedup_scope" not in columns:
+            # Duplicates were matched across documents before scopes existed;
+            # clearing their hash makes the next indexing embed them again
+            self._db.execute("UPDATE chunks SET hash = '' WHERE duplicate_of IS NOT NULL")
+        for band in range(BANDS):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS chunks_band{band} ON chunks (namespace, band{band})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_duplicate_of ON chunks (namespace, duplicate_of)")
+        self._db.commit()
+
+    def is_empty(self) -> bool:
+        """Whether no chunk has been recorded in any namespace"""
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is None
+
+    def get(self, namespace: Optional[str], doc_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Current {chunk_id: hash} map for each requested document"""
+        manifest = {doc_id: {} for doc_id in doc_ids}
+        if not doc_ids:
+            return manifest
+
+        with self._lock:
+            placeholders = ",".join("?" * len(doc_ids))
+            rows = self._db.execute(
+                f"SELECT doc_id, chunk_id, hash FROM chunks WHERE namespace = ? AND doc_id IN ({placeholders})",
+                [namespace or "", *doc_ids]
+            ).fetchall()
+        for doc_id, chunk_id, digest in rows:
+            manifest[doc_id][chunk_id] = digest
+        return manifest
+
+    def replace(self, namespace: Optional[str], documents: Dict[str, Dict[str, str]],
+                fingerprints: Optional[Dict[str, Tuple[int, Optional[str], str]]] = None):
+        """Record the full set of chunks each document now owns.
+
+        `fingerprints` maps re-fingerprinted chunk ids to (simhash, duplicate_of, scope);
+        other chunks keep what was recorded before. Chunks skipped as
+        near-duplicates of a chunk that is now gone or changed get their hash
+        cleared, so the next indexing of their document embeds them again.
+        """
+        fingerprints = fingerprints or {}
+        namespace = namespace or ""
+        released = []
+        with self._lock:
+            self._make_writable()
+            for doc_id, chunks in documents.items():
+                previous = {
+                    chunk_id: (digest, simhash, duplicate_of, scope)
+                    for chunk_id, digest, simhash, duplicate_of, scope in self._db.execute(
+                        "SELECT chunk_id, hash, simhash, duplicate_of, dedup_scope FROM chunks "
+                        "WHERE namespace = ? AND doc_id = ?",
+                        (namespace, doc_id)
+                    )
+                }
+                released.extend(
+                    chunk_id
+                    for chunk_id, (digest, _, duplicate_of, _) in previous.items()
+                    if duplicate_of is None and chunks.get(chunk_id) != digest
+                )
+                self._db.execute(
+                    "DELETE FROM chunks WHERE namespace = ? AND doc_id = ?",
+                    (namespace, doc_id)
+                )
+
+                rows = []
+                for chunk_id, digest in chunks.items():
+                    if chunk_id in fingerprints:
+                        simhash, duplicate_of, scope = fingerprints[chunk_id]
+                        simhash = to_signed(simhash)
+                    else:
+                        _, simhash, duplicate_of, scope = previous.get(chunk_id, (None, None, None, None))
+                    chunk_bands = bands(to_unsigned(simhash)) if simhash is not None else [None] * BANDS
+                    rows.append((namespace, doc_id, chunk_id, digest, simhash, duplicate_of, scope, *chunk_bands))
+                self._db.executemany(
+                    f"INSERT INTO chunks (namespace, doc_id, chunk_id, hash, simhash, duplicate_of, dedup_scope, "
+                    f"{', '.join(f'band{band}' for band in range(BANDS))}) "
+                    f"VALUES ({', '.join('?' * (7 + BANDS))})",
+                    rows
+                )
+
+            for start in range(0, len(released), 500):
+                batch = released[start:start + 500]
+                self._db.execute(
+                    f"UPDATE chunks SET hash = '' WHERE namespace = ? AND duplicate_of IN ({','.join('?' * len(batch))})",
+                    [namespace, *batch]
+                )
+            self._db.commit()
+
+    def duplicates(self, namespace: Optional[str], chunk_ids: List[str]) -> set:
+        """The given chunks that are currently recorded as near-duplicates (and so not stored)"""
+        found = set()
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                found.update(row[0] for row in self._db.execute(
+                    f"SELECT chunk_id FROM chunks WHERE namespace = ? AND duplicate_of IS NOT NULL "
+                    f"AND chunk_id IN ({','.join('?' * len(batch))})",
+                    [namespace or "", *batch]
+                ))
+        return found
+
+    def near_duplicates(self, namespace: Optional[str], fingerprints: Dict[str, Tuple[int, str]],
+                        max_distance: int) -> Dict[str, List[Tuple[str, str, str]]]:
+        """Indexed (not duplicate) chunks in the same scope within max_distance bits of each fingerprint.
+
+        `fingerprints` maps keys to (simhash, scope). Returns
+        {key: [(chunk_id, doc_id, hash), ...]} ordered closest first.
+        """
+        matches = {}
+        with self._lock:
+            for key, (fingerprint, scope) in fingerprints.items():
+                candidates = []
+                for chunk_id, doc_id, digest, simhash in self._db.execute(
+                    "SELECT chunk_id, doc_id, hash, simhash FROM chunks "
+                    "WHERE namespace = ? AND dedup_scope = ? AND duplicate_of IS NULL AND ("
+                    + " OR ".join(f"band{band} = ?" for band in range(BANDS)) + ")",
+                    [namespace or "", scope, *bands(fingerprint)]
+                ):
+                    distance = hamming(fingerprint, to_unsigned(simhash))
+                    if distance <= max_distance:
+                        candidates.append((distance, chunk_id, doc_id, digest))
+                candidates.sort()
+                matches[key] = [candidate[1:] for candidate in candidates]
+        return matches
+
+    def save(self, path: str):
+        """Write the manifest to a standalone database file"""
+        with self._lock:
+            save_database(self._db, path)
+
+    def load(self, path: str):
+        """Serve the manifest from a file written by save(), read-only until the first write"""
+        with self._lock:
+            self._db.close()
+            self._db = open_database(path)
+            self._read_only = True
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(chunks)")}
+            if any(column.split()[0] not in columns for column in _FINGERPRINT_COLUMNS):
+                # Snapshots from before the fingerprint columns are migrated in memory
+                self._make_writable()
+                self._migrate()
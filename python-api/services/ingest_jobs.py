@@ -0,0 +1,332 @@
+"""
+Background ingest jobs with progress tracking, cancellation and resume
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+
+from services.index_manifest import with_document_id
+
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_JOB_COLUMNS = (
+    "id", "namespace", "status", "total_documents", "total_batches", "committed_batches",
+    "processed_documents", "stats", "error", "created_at", "started_at", "updated_at"
+)
+
+
+class JobQueueFull(Exception):
+    """The ingest queue has no room for another job"""
+
+
+class JobNotFound(Exception):
+    """No ingest job exists with the given id"""
+
+
+class _JobStore:
+    """SQLite persistence for job state and the not-yet-committed document batches"""
+
+    def __init__(self, path: Optional[str] = None):
+        if path and path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    namespace TEXT,
+                    status TEXT NOT NULL,
+                    total_documents INTEGER NOT NULL,
+                    total_batches INTEGER NOT NULL,
+                    committed_batches INTEGER NOT NULL DEFAULT 0,
+                    processed_documents INTEGER NOT NULL DEFAULT 0,
+                    stats TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_batches (
+                    job_id TEXT NOT NULL,
+                    batch_index INTEGER NOT NULL,
+                    documents TEXT NOT NULL,
+                    PRIMARY KEY (job_id, batch_index)
+                );
+                """
+            )
+            self._db.commit()
+
+    def create(self, job: Dict[str, Any], batches: List[List[Dict[str, Any]]]):
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO jobs ({', '.join(_JOB_COLUMNS)}) VALUES ({', '.join('?' * len(_JOB_COLUMNS))})",
+                [json.dumps(job[column]) if column == "stats" else job[column] for column in _JOB_COLUMNS]
+            )
+            self._db.executemany(
+                "INSERT INTO job_batches (job_id, batch_index, documents) VALUES (?, ?, ?)",
+                [(job["id"], index, json.dumps(batch)) for index, batch in enumerate(batches)]
+            )
+            self._db.commit()
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM job_batches WHERE job_id = ?", (job_id,))
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._db.commit()
+
+    def update(self, job_id: str, **fields):
+        if "stats" in fields:
+            fields["stats"] = json.dumps(fields["stats"])
+        fields["updated_at"] = time.time()
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {', '.join(f'{key} = ?' for key in fields)} WHERE id = ?",
+                [*fields.values(), job_id]
+            )
+            self._db.commit()
+
+    def transition(self, job_id: str, from_status: str, **fields) -> bool:
+        """Update a job only if it still has from_status; False when another writer got there first"""
+        if "stats" in fields:
+            fields["stats"] = json.dumps(fields["stats"])
+        fields["updated_at"] = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET {', '.join(f'{key} = ?' for key in fields)} WHERE id = ? AND status = ?",
+                [*fields.values(), job_id, from_status]
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def commit_batch(self, job_id: str, batch_index: int, **fields):
+        """Advance the resume point and drop the batch that was just indexed"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM job_batches WHERE job_id = ? AND batch_index = ?",
+                (job_id, batch_index)
+            )
+        self.update(job_id, committed_batches=batch_index + 1, **fields)
+
+    def finish(self, job_id: str, **fields):
+        """Record a terminal state and discard any remaining batches"""
+        with self._lock:
+            self._db.execute("DELETE FROM job_batches WHERE job_id = ?", (job_id,))
+        self.update(job_id, **fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, statuses: Optional[tuple] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs"
+        params: List[Any] = []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def batch(self, job_id: str, batch_index: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT documents FROM job_batches WHERE job_id = ? AND batch_index = ?",
+                (job_id, batch_index)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def _to_job(self, row) -> Dict[str, Any]:
+        job = dict(zip(_JOB_COLUMNS, row))
+        job["stats"] = json.loads(job["stats"])
+        return job
+
+
+class IngestJobManager:
+    """Runs index_documents for submitted document sets on a pool of background workers.
+
+    Each job is split into batches; the job's resume point advances after
+    every batch the vector service has written, so a restart continues from
+    the last committed batch instead of starting over.
+    """
+
+    def __init__(self, vector_service, path: Optional[str] = None, workers: int = 2,
+                 queue_size: int = 100, batch_size: int = 50):
+        self.vector_service = vector_service
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self._store = _JobStore(path)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._pending_puts = set()
+
+    async def start(self):
+        """Start the workers and re-queue jobs interrupted by a previous shutdown"""
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        interrupted = await asyncio.to_thread(self._store.list, ACTIVE_STATUSES, 1_000_000)
+        for job in sorted(interrupted, key=lambda job: job["created_at"]):
+            await asyncio.to_thread(self._store.update, job["id"], status="queued")
+            # Resumed jobs may exceed the queue bound; wait for room in the background
+            task = asyncio.create_task(self._queue.put(job["id"]))
+            self._pending_puts.add(task)
+            task.add_done_callback(self._pending_puts.discard)
+        if interrupted:
+            print(f"Resuming {len(interrupted)} ingest job(s)")
+
+    async def stop(self):
+        """Stop the workers; in-flight jobs stay active and resume on next start"""
+        tasks = [*self._worker_tasks, *self._pending_puts]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, documents: List[Dict[str, Any]], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a job and queue it, returning its initial state immediately"""
+        if self._queue.full():
+            raise JobQueueFull("Ingest queue is full")
+
+        now = time.time()
+        # Each batch is a separate index_documents call, so ids must not depend on position
+        documents = [with_document_id(document) for document in documents]
+        batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
+        job = {
+            "id": uuid.uuid4().hex,
+            "namespace": namespace,
+            "status": "queued",
+            "total_documents": len(documents),
+            "total_batches": len(batches),
+            "committed_batches": 0,
+            "processed_documents": 0,
+            "stats": {"indexed_count": 0, "added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "duplicates": 0},
+            "error": None,
+            "created_at": now,
+            "started_at": None,
+            "updated_at": now
+        }
+        await asyncio.to_thread(self._store.create, job, batches)
+        try:
+            self._queue.put_nowait(job["id"])
+        except asyncio.QueueFull:
+            # The queue filled up while the job was being saved
+            await asyncio.to_thread(self._store.delete, job["id"])
+            raise JobQueueFull("Ingest queue is full")
+        return self._describe(job)
+
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self._store.get, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return self._describe(job)
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        jobs = await asyncio.to_thread(self._store.list, None, limit)
+        return [self._describe(job) for job in jobs]
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running job; batches already committed stay indexed"""
+        job = await asyncio.to_thread(self._store.get, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+
+        if job["status"] in ACTIVE_STATUSES:
+            await asyncio.to_thread(self._store.finish, job_id, status="cancelled")
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        return await self.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await asyncio.to_thread(self._store.get, job_id)
+                # Jobs cancelled while waiting in the queue are skipped
+                if job is None or job["status"] != "queued":
+                    continue
+
+                task = asyncio.create_task(self._run(job))
+                self._running[job_id] = task
+                await asyncio.wait({task})
+                if not task.cancelled() and task.exception() is not None:
+                    error = task.exception()
+                    print(f"Ingest job {job_id} failed: {error}")
+                    await asyncio.to_thread(self._store.finish, job_id, status="failed", error=str(error))
+            except asyncio.CancelledError:
+                # Worker shutdown: stop the job but leave it resumable
+                task = self._running.get(job_id)
+                if task is not None:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                raise
+            finally:
+                self._running.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        stats = dict(job["stats"])
+        processed = job["processed_documents"]
+        # Keep the original start time across resumes so throughput stays honest;
+        # a job cancelled since it was dequeued is not started
+        started = await asyncio.to_thread(
+            self._store.transition, job_id, "queued",
+            status="running", started_at=job["started_at"] or time.time()
+        )
+        if not started:
+            return
+
+        for batch_index in range(job["committed_batches"], job["total_batches"]):
+            documents = await asyncio.to_thread(self._store.batch, job_id, batch_index)
+            result = await self.vector_service.index_documents(documents, namespace=job["namespace"])
+
+            processed += len(documents)
+            for key, value in result.items():
+                stats[key] = stats.get(key, 0) + value
+            await asyncio.to_thread(
+                self._store.commit_batch, job_id, batch_index,
+                processed_documents=processed, stats=stats
+            )
+
+        await asyncio.to_thread(self._store.transition, job_id, "running", status="completed")
+
+    def _describe(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Public view of a job, including progress and throughput"""
+        elapsed = None
+        throughput = None
+        if job["started_at"]:
+            end = job["updated_at"] if job["status"] not in ACTIVE_STATUSES else time.time()
+            elapsed = max(0.0, end - job["started_at"])
+            if elapsed > 0:
+                throughput = job["processed_documents"] / elapsed
+
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "namespace": job["namespace"],
+            "total_documents": job["total_documents"],
+            "processed_documents": job["processed_documents"],
+            "total_batches": job["total_batches"],
+            "committed_batches": job["committed_batches"],
+            "progress": job["committed_batches"] / job["total_batches"] if job["total_batches"] else 1.0,
+            "documents_per_second": throughput,
+            "elapsed_seconds": elapsed,
+            "error": job["error"],
+            **job["stats"]
+        }
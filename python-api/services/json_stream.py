@@ -0,0 +1,104 @@
+"""
+Incremental scanner that reports values of a streamed JSON document as soon as they are complete
+"""
+import json
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+PathKey = Union[str, int]
+
+
+class JsonEventScanner:
+    """Reports values at selected paths while JSON text is still arriving.
+
+    A path is a sequence of object keys and array indexes from the root;
+    "*" matches any key or index at that level, so ("recommended_stack", "*")
+    reports each recommendation as soon as its closing brace arrives. Text
+    before the root value (such as a markdown code fence) is skipped. The
+    scanner only tracks nesting, so feeding it is linear in the text length.
+    """
+
+    def __init__(self, paths: Sequence[Sequence[PathKey]]):
+        self.paths = [tuple(path) for path in paths]
+        self.done = False
+        self._text = ""
+        self._position = 0
+        # One [opening char, start offset, current key or index, expecting key] per open container
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._scalar_start: Optional[int] = None
+
+    def _matches(self, path: Tuple[PathKey, ...]) -> bool:
+        return any(
+            len(pattern) == len(path) and all(p == "*" or p == k for p, k in zip(pattern, path))
+            for pattern in self.paths
+        )
+
+    def _complete(self, start: int, end: int, events: List[Tuple[Tuple[PathKey, ...], Any]]):
+        path = tuple(entry[2] for entry in self._stack)
+        if self._matches(path):
+            try:
+                events.append((path, json.loads(self._text[start:end])))
+            except ValueError:
+                # Malformed output; the final parse of the whole text reports it
+                pass
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[PathKey, ...], Any]]:
+        """Add text and return (path, value) for every selected value it completed"""
+        events = []
+        if self.done or not chunk:
+            return events
+        self._text += chunk
+        text = self._text
+
+        for i in range(self._position, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1][2] = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._complete(self._string_start, i + 1, events)
+                continue
+
+            if self._scalar_start is not None and (c in ",]}" or c.isspace()):
+                self._complete(self._scalar_start, i, events)
+                self._scalar_start = None
+
+            if not self._stack:
+                if c in "{[":
+                    self._stack.append([c, i, 0 if c == "[" else None, c == "{"])
+                continue
+
+            top = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = top[0] == "{" and top[3]
+            elif c in "{[":
+                self._stack.append([c, i, 0 if c == "[" else None, c == "{"])
+            elif c in "]}":
+                start = self._stack.pop()[1]
+                self._complete(start, i + 1, events)
+                if not self._stack:
+                    self.done = True
+                    break
+            elif c == ":":
+                top[3] = False
+            elif c == ",":
+                if top[0] == "[":
+                    top[2] += 1
+                else:
+                    top[2], top[3] = None, True
+            elif not c.isspace() and self._scalar_start is None:
+                self._scalar_start = i
+
+        self._position = len(text)
+        return events
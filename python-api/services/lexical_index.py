@@ -0,0 +1,136 @@
+"""
+BM25 lexical index over chunk content, backed by SQLite FTS5
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+from services.snapshot import save_database, open_database, copy_to_memory
+from services.vector_store import VectorMatch, filter_values
+
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class LexicalIndex:
+    """Keyword index over the same chunk records the vector store holds"""
+
+    def __init__(self, path: Optional[str] = None):
+        if path and path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        # Set while serving a snapshot file, which is copied on the first write
+        self._read_only = False
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(content);
+                CREATE TABLE IF NOT EXISTS chunk_rows (
+                    namespace TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    text_rowid INTEGER NOT NULL,
+                    metadata TEXT NOT NULL,
+                    PRIMARY KEY (namespace, chunk_id)
+                );
+                CREATE INDEX IF NOT EXISTS chunk_rows_text ON chunk_rows (text_rowid);
+                """
+            )
+            self._db.commit()
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None):
+        """Index the content of vector records, replacing earlier versions"""
+        with self._lock:
+            self._make_writable()
+            self._delete(namespace, [vector["id"] for vector in vectors])
+            for vector in vectors:
+                metadata = vector.get("metadata") or {}
+                cursor = self._db.execute(
+                    "INSERT INTO chunk_text (content) VALUES (?)",
+                    (metadata.get("content", ""),)
+                )
+                self._db.execute(
+                    "INSERT INTO chunk_rows (namespace, chunk_id, text_rowid, metadata) VALUES (?, ?, ?, ?)",
+                    (namespace or "", vector["id"], cursor.lastrowid, json.dumps(metadata, default=str))
+                )
+            self._db.commit()
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None):
+        with self._lock:
+            self._make_writable()
+            self._delete(namespace, ids)
+            self._db.commit()
+
+    def _make_writable(self):
+        if self._read_only:
+            self._db = copy_to_memory(self._db)
+            self._read_only = False
+
+    def _delete(self, namespace: Optional[str], ids: List[str]):
+        for chunk_id in ids:
+            row = self._db.execute(
+                "SELECT text_rowid FROM chunk_rows WHERE namespace = ? AND chunk_id = ?",
+                (namespace or "", chunk_id)
+            ).fetchone()
+            if row is None:
+                continue
+            self._db.execute("DELETE FROM chunk_text WHERE rowid = ?", (row[0],))
+            self._db.execute(
+                "DELETE FROM chunk_rows WHERE namespace = ? AND chunk_id = ?",
+                (namespace or "", chunk_id)
+            )
+
+    def search(self, query: str, top_k: int, namespace: Optional[str] = None,
+               filters: Optional[Dict[str, Any]] = None) -> List[VectorMatch]:
+        """BM25-ranked matches for any of the query's terms, best first"""
+        terms = _TOKEN.findall(query.lower())
+        if not terms or top_k <= 0:
+            return []
+
+        # Quote every term so user input can never be read as FTS5 query syntax
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
+        sql = (
+            "SELECT r.chunk_id, r.metadata, bm25(chunk_text) AS rank "
+            "FROM chunk_text JOIN chunk_rows r ON r.text_rowid = chunk_text.rowid "
+            "WHERE chunk_text MATCH ? AND r.namespace = ?"
+        )
+        params: List[Any] = [match, namespace or ""]
+        for key, condition in (filters or {}).items():
+            values = filter_values(condition)
+            if not values:
+                return []
+            # json_each yields a scalar as one row and a list per element, so
+            # list metadata matches element by element like the vector stores
+            sql += (
+                " AND EXISTS (SELECT 1 FROM json_each(r.metadata, ?) "
+                f"WHERE json_each.value IN ({', '.join('?' * len(values))}))"
+            )
+            params.append('$."' + key.replace('"', '') + '"')
+            params.extend(values)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(top_k)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        # FTS5's bm25() is negated so that smaller is better; flip it back
+        return [
+            VectorMatch(id=chunk_id, score=-rank, metadata=json.loads(metadata))
+            for chunk_id, metadata, rank in rows
+        ]
+
+    def save(self, path: str):
+        """Write the index to a standalone database file"""
+        with self._lock:
+            save_database(self._db, path)
+
+    def load(self, path: str):
+        """Serve the index from a file written by save(), read-only until the first write"""
+        with self._lock:
+            self._db.close()
+            self._db = open_database(path)
+            self._read_only = True
@@ -0,0 +1,53 @@
+"""
+CPU-bound document preprocessing (normalization, chunking, hashing, fingerprinting) for ingest.
+
+Functions here run in worker processes, so they only take and return plain
+picklable data and import nothing heavier than the text splitter.
+"""
+import unicodedata
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.dedup import simhash
+from services.index_manifest import chunk_hash
+
+
+_splitters: Dict[Tuple[int, int], Any] = {}
+
+
+def _splitter(chunk_size: int, chunk_overlap: int):
+    """One text splitter per worker process and configuration"""
+    splitter = _splitters.get((chunk_size, chunk_overlap))
+    if splitter is None:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        _splitters[(chunk_size, chunk_overlap)] = splitter
+    return splitter
+
+
+def normalize_content(text: str) -> str:
+    """NFC-normalize text and unify line endings so equivalent input chunks identically"""
+    return unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def preprocess_documents(documents: List[Dict[str, Any]], chunk_size: int, chunk_overlap: int,
+                         fingerprint: bool = False) -> List[Tuple[Optional[str], Dict[str, Any], List[Tuple[str, str, Optional[int]]]]]:
+    """Split, hash and optionally SimHash-fingerprint documents.
+
+    Returns (doc_id, metadata, [(chunk, hash, simhash), ...]) per document,
+    in input order. doc_id is None when the document has none; the caller
+    assigns it. simhash is None unless fingerprint is set.
+    """
+    splitter = _splitter(chunk_size, chunk_overlap)
+    processed = []
+    for doc_data in documents:
+        metadata = doc_data.get('metadata', {})
+        chunks = splitter.split_text(normalize_content(doc_data.get('content', '')))
+        processed.append((
+            doc_data.get('id'),
+            metadata,
+            [
+                (chunk, chunk_hash(chunk, metadata), simhash(chunk) if fingerprint else None)
+                for chunk in chunks
+            ]
+        ))
+    return processed
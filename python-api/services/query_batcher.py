@@ -0,0 +1,78 @@
+"""
+Cross-request micro-batching of query embeddings
+"""
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class EmbeddingMicroBatcher:
+    """Collects query texts from concurrent callers and embeds them in one call.
+
+    A batch is flushed when it reaches `max_batch_size` or when `window_ms`
+    has passed since its first query arrived, whichever comes first.
+    """
+
+    def __init__(self, embeddings, window_ms: float = 5.0, max_batch_size: int = 64):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.queries = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single query as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.queries += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        # Callers that gave up while waiting do not need an embedding
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._embed_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        self.batches += 1
+        try:
+            vectors = await self.embeddings.aembed_documents([text for text, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters"""
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "average_batch_size": self.queries / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,161 @@
+"""
+Exact-match cache for LLM responses with an in-memory LRU tier and an optional SQLite tier
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.embedding_cache import normalize_text
+
+
+def canonical_text(value: Optional[str]) -> Optional[str]:
+    return normalize_text(value).lower() if value is not None else None
+
+
+def canonical_list(values: Optional[List[str]]) -> List[str]:
+    """Order- and case-insensitive form of a list of free-text items"""
+    return sorted({canonical_text(value) for value in values or [] if value and value.strip()})
+
+
+def canonical_analysis_request(request) -> Dict[str, Any]:
+    """Fields of a TechnologyAnalysisRequest that identify equivalent requests"""
+    return {
+        "technology_name": canonical_text(request.technology_name),
+        "context": canonical_text(request.context),
+        "comparison_with": canonical_list(request.comparison_with)
+    }
+
+
+def canonical_stack_request(request) -> Dict[str, Any]:
+    """Fields of a StackRecommendationRequest that identify equivalent requests"""
+    return {
+        "project_type": canonical_text(request.project_type),
+        "requirements": canonical_list(request.requirements),
+        "team_size": request.team_size,
+        "experience_level": canonical_text(request.experience_level),
+        "budget": canonical_text(request.budget),
+        "timeline": canonical_text(request.timeline),
+        "preferred_languages": canonical_list(request.preferred_languages),
+        "constraints": canonical_list(request.constraints)
+    }
+
+
+class ResponseCache:
+    """Maps a canonical request key to a JSON-serializable LLM response.
+
+    Entries expire after `ttl_seconds` in both tiers. The memory tier is a
+    bounded LRU; the SQLite tier, when a path is given, survives restarts.
+    Writes to it drop expired rows and then the oldest beyond `max_disk_entries`.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400.0, path: Optional[str] = None,
+                 max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            self._db.commit()
+
+    def key(self, kind: str, canonical: Dict[str, Any]) -> str:
+        """Stable key for a canonical request; include everything that changes the answer"""
+        payload = json.dumps({"kind": kind, **canonical}, sort_keys=True, default=str)
+        return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, record: bool = True) -> Optional[Any]:
+        """Cached value for key, checking memory first and then disk.
+
+        record=False leaves the hit/miss counters alone, for lookups of keys
+        found some other way (e.g. a semantic match).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += record
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += record
+                    self.disk_hits += record
+                    return value
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += record
+            return None
+
+    def put(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at)
+                )
+                self._prune(now)
+                self._db.commit()
+
+    def _prune(self, now: float):
+        """Drop expired rows, then the ones closest to expiry beyond the disk bound"""
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None
+            }
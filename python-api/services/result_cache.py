@@ -0,0 +1,87 @@
+"""
+Bounded TTL/LRU cache for search results with per-namespace invalidation
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.embedding_cache import normalize_text
+
+
+class SearchResultCache:
+    """Caches search results keyed by query, namespace, filters, limit and mode.
+
+    Every namespace has a generation number that writes bump; entries record
+    the generation they were computed under and are treated as misses once
+    it changes, so an ingest invalidates its namespace in O(1).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, Tuple[float, int, List[Any]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, query: str, limit: int, namespace: Optional[str],
+            filters: Optional[Dict[str, Any]], mode: str) -> tuple:
+        return (
+            namespace or "",
+            normalize_text(query),
+            limit,
+            json.dumps(filters or {}, sort_keys=True, default=str),
+            mode
+        )
+
+    def generation(self, namespace: Optional[str]) -> int:
+        """Current generation of a namespace; capture it before computing a result"""
+        with self._lock:
+            return self._generations.get(namespace or "", 0)
+
+    def get(self, key: tuple) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, generation, results = entry
+                if expires_at > time.monotonic() and generation == self._generations.get(key[0], 0):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(results)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, results: List[Any], generation: int):
+        """Store a result computed under `generation`; dropped if the namespace has moved on"""
+        with self._lock:
+            if generation != self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, generation, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace: Optional[str]):
+        """Invalidate every cached result for a namespace"""
+        with self._lock:
+            key = namespace or ""
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "invalidations": self.invalidations
+            }
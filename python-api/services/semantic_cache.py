@@ -0,0 +1,119 @@
+"""
+Embedding-similarity index over cached LLM responses, for serving paraphrased requests
+"""
+import threading
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+# Thresholds the stats report evaluates against observed similarities
+REPORT_THRESHOLDS = [0.85, 0.88, 0.9, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98, 0.99]
+
+
+class SemanticCache:
+    """Finds the cached request most similar to a new one.
+
+    Entries are grouped into partitions that must match exactly (kind,
+    model, prompt and any field that is not safe to paraphrase); within a
+    partition the nearest entry by cosine similarity is a hit when it
+    reaches `threshold`. Only response cache keys are stored here, so
+    values keep the response cache's TTL and persistence.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, sample_size: int = 1000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._partitions: Dict[str, "OrderedDict[str, np.ndarray]"] = {}
+        self._matrices: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        self._order: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Best similarity seen by recent lookups, for the threshold trade-off report
+        self._similarities = deque(maxlen=sample_size)
+        # (similarity, agreement) pairs from audited hits and near misses
+        self._audits = deque(maxlen=sample_size)
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        return array / max(float(np.linalg.norm(array)), 1e-12)
+
+    def lookup(self, partition: str, vector: List[float]) -> Optional[Tuple[str, float]]:
+        """(key, similarity) of the nearest entry, or None for an empty partition.
+
+        Counts a hit when the similarity reaches the threshold; callers only
+        serve the entry in that case.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            entries = self._partitions.get(partition)
+            best_key, best = None, -1.0
+            if entries:
+                if partition not in self._matrices:
+                    self._matrices[partition] = (np.stack(list(entries.values())), list(entries))
+                matrix, keys = self._matrices[partition]
+                similarities = matrix @ query
+                row = int(np.argmax(similarities))
+                best_key, best = keys[row], float(similarities[row])
+            self._similarities.append(best)
+
+            if best_key is not None and best >= self.threshold:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return (best_key, best) if best_key is not None else None
+
+    def add(self, partition: str, vector: List[float], key: str):
+        with self._lock:
+            self._partitions.setdefault(partition, OrderedDict())[key] = self._normalize(vector)
+            self._matrices.pop(partition, None)
+            self._order[(partition, key)] = None
+            self._order.move_to_end((partition, key))
+            while len(self._order) > self.max_entries:
+                oldest_partition, oldest_key = self._order.popitem(last=False)[0]
+                self._remove(oldest_partition, oldest_key)
+
+    def discard(self, partition: str, key: str):
+        """Forget an entry whose response is no longer cached"""
+        with self._lock:
+            self._order.pop((partition, key), None)
+            self._remove(partition, key)
+
+    def _remove(self, partition: str, key: str):
+        entries = self._partitions.get(partition)
+        if entries is not None and entries.pop(key, None) is not None:
+            self._matrices.pop(partition, None)
+            if not entries:
+                del self._partitions[partition]
+
+    def record_audit(self, similarity: float, agreement: float):
+        """Record how well a neighbour's cached answer agreed with a fresh one at this similarity"""
+        with self._lock:
+            self._audits.append((similarity, agreement))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate plus what recent traffic would have hit, and how audited hits agreed, per threshold"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            similarities = np.asarray(self._similarities, dtype=np.float32)
+            audits = list(self._audits)
+            report = []
+            for threshold in REPORT_THRESHOLDS:
+                agreements = [agreement for similarity, agreement in audits if similarity >= threshold]
+                report.append({
+                    "threshold": threshold,
+                    "hit_rate": float(np.mean(similarities >= threshold)) if len(similarities) else 0.0,
+                    "audited": len(agreements),
+                    "agreement": float(np.mean(agreements)) if agreements else None
+                })
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "threshold": self.threshold,
+                "entries": len(self._order),
+                "max_entries": self.max_entries,
+                "threshold_report": report
+            }
@@ -0,0 +1,206 @@
+"""
+Vector store sharded across worker processes with scatter-gather search
+"""
+import json
+import multiprocessing
+import os
+import threading
+import zlib
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from services.vector_store import VectorStore, VectorMatch, LocalVectorStore
+
+
+def _shard_worker(connection, store_options: Dict[str, Any]):
+    """Serve LocalVectorStore calls for one shard until the pipe closes"""
+    store = LocalVectorStore(**store_options)
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            method, args, kwargs = message
+            try:
+                reply = (True, getattr(store, method)(*args, **kwargs))
+            except Exception as e:
+                reply = (False, e)
+            try:
+                connection.send(reply)
+            except Exception as e:
+                # The error or result could not be pickled; report it as text
+                connection.send((False, Exception(f"{type(e).__name__}: {e}")))
+    finally:
+        store.close()
+
+
+class ShardedVectorStore(VectorStore):
+    """Partitions vectors over worker processes that each own a LocalVectorStore.
+
+    With shard_by="id" every namespace is spread over all shards by a
+    stable hash of the vector id; queries are scattered to every shard and
+    the per-shard top-k lists merged. With shard_by="namespace" a namespace
+    lives on one shard, so each query touches a single process and
+    concurrent queries on different namespaces run on different cores.
+    """
+
+    def __init__(self, shards: int, shard_by: str = "id", **store_options):
+        if shards < 1:
+            raise ValueError("A sharded store needs at least one shard")
+        if shard_by not in ("id", "namespace"):
+            raise ValueError(f"Unknown shard key: {shard_by}")
+        self.shards = shards
+        self.shard_by = shard_by
+        self.dimension = store_options["dimension"]
+        self.store_options = store_options
+
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for _ in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(child, store_options), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        # One request at a time per pipe; multi-shard calls lock in shard order
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % self.shards
+
+    def _shard_for_id(self, vector_id: str, namespace: Optional[str]) -> int:
+        return self._shard(vector_id if self.shard_by == "id" else namespace or "")
+
+    def _query_shards(self, namespace: Optional[str]) -> List[int]:
+        if self.shard_by == "namespace":
+            return [self._shard(namespace or "")]
+        return list(range(self.shards))
+
+    def _scatter(self, requests: Dict[int, tuple]) -> Dict[int, Any]:
+        """Send (method, args, kwargs) to each shard, then gather every reply"""
+        shard_ids = sorted(requests)
+        for shard in shard_ids:
+            self._locks[shard].acquire()
+
+        replies = {}
+        sent = []
+        try:
+            for shard in shard_ids:
+                self._connections[shard].send(requests[shard])
+                sent.append(shard)
+        finally:
+            for shard in shard_ids:
+                if shard in sent:
+                    try:
+                        replies[shard] = self._connections[shard].recv()
+                    except (EOFError, OSError) as e:
+                        replies[shard] = (False, Exception(f"Shard {shard} is unavailable: {e}"))
+                self._locks[shard].release()
+
+        results = {}
+        for shard in shard_ids:
+            ok, value = replies[shard]
+            if not ok:
+                raise value
+            results[shard] = value
+        return results
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None):
+        routed: Dict[int, List[Dict[str, Any]]] = {}
+        for vector in vectors:
+            routed.setdefault(self._shard_for_id(vector["id"], namespace), []).append({
+                "id": vector["id"],
+                # Arrays pickle far faster than lists of Python floats
+                "values": np.asarray(vector["values"], dtype=np.float32),
+                "metadata": vector.get("metadata") or {}
+            })
+        self._scatter({
+            shard: ("upsert", (batch,), {"namespace": namespace})
+            for shard, batch in routed.items()
+        })
+
+    def query(self, vector: List[float], top_k: int, namespace: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None) -> List[VectorMatch]:
+        if top_k <= 0:
+            return []
+        request = ("query", (np.asarray(vector, dtype=np.float32), top_k),
+                   {"namespace": namespace, "filters": filters})
+        results = self._scatter({shard: request for shard in self._query_shards(namespace)})
+        matches = [match for shard_matches in results.values() for match in shard_matches]
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:top_k]
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None):
+        routed: Dict[int, List[str]] = {}
+        for vector_id in ids:
+            routed.setdefault(self._shard_for_id(vector_id, namespace), []).append(vector_id)
+        self._scatter({
+            shard: ("delete", (shard_ids,), {"namespace": namespace})
+            for shard, shard_ids in routed.items()
+        })
+
+    def count(self, namespace: Optional[str] = None) -> int:
+        """Number of vectors stored in a namespace across all shards"""
+        request = ("count", (), {"namespace": namespace})
+        return sum(self._scatter({shard: request for shard in self._query_shards(namespace)}).values())
+
+    def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        request = ("list_ids", (prefix,), {"namespace": namespace})
+        results = self._scatter({shard: request for shard in self._query_shards(namespace)})
+        return [vector_id for shard_ids in results.values() for vector_id in shard_ids]
+
+    def memory_usage(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Vector memory summed over shards"""
+        request = ("memory_usage", (), {"namespace": namespace})
+        results = self._scatter({shard: request for shard in range(self.shards)})
+        usage = {"scan_bytes": 0, "rescore_disk_bytes": 0, "float32_bytes": 0}
+        for shard_usage in results.values():
+            for key in usage:
+                usage[key] += shard_usage[key]
+        usage["storage_dtype"] = self.store_options.get("storage_dtype", "float32")
+        usage["rescore"] = results[0]["rescore"]
+        usage["shards"] = self.shards
+        return usage
+
+    def save_snapshot(self, directory: str):
+        """Have every shard write its own snapshot under `directory` in parallel"""
+        self._scatter({
+            shard: ("save_snapshot", (os.path.join(directory, f"shard-{shard}"),), {})
+            for shard in range(self.shards)
+        })
+        with open(os.path.join(directory, "shards.json"), "w") as handle:
+            json.dump({"shards": self.shards, "shard_by": self.shard_by}, handle)
+
+    def load_snapshot(self, directory: str) -> bool:
+        """Map a snapshot written with the same shard layout; False if it does not match"""
+        try:
+            with open(os.path.join(directory, "shards.json")) as handle:
+                layout = json.load(handle)
+        except FileNotFoundError:
+            return False
+        if layout != {"shards": self.shards, "shard_by": self.shard_by}:
+            return False
+        results = self._scatter({
+            shard: ("load_snapshot", (os.path.join(directory, f"shard-{shard}"),), {})
+            for shard in range(self.shards)
+        })
+        return all(results.values())
+
+    def close(self):
+        for shard, connection in enumerate(self._connections):
+            with self._locks[shard]:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
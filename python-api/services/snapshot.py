@@ -0,0 +1,153 @@
+"""
+On-disk snapshot layout and memory-mappable record files for the local index
+"""
+import json
+import os
+import shutil
+import sqlite3
+import time
+from urllib.parse import quote
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+
+CURRENT_FILE = "CURRENT"
+
+
+class MappedStrings(Sequence):
+    """Read-only sequence of strings stored as one UTF-8 blob plus row offsets.
+
+    Both arrays are memory-mapped, so opening is constant-time and a string
+    is only decoded when it is accessed.
+    """
+
+    def __init__(self, path: str):
+        self._blob = np.load(path + ".bin.npy", mmap_mode="r")
+        self._offsets = np.load(path + ".offsets.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _decode(self, index: int) -> str:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._decode(index)
+
+
+class MappedRecords(MappedStrings):
+    """MappedStrings holding one JSON document per row"""
+
+    def _decode(self, index: int):
+        return json.loads(super()._decode(index))
+
+
+def write_strings(path: str, strings: Iterable[str]):
+    """Write strings in the layout MappedStrings reads"""
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(path + ".bin.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(path + ".offsets.npy", offsets)
+
+
+def write_records(path: str, records: Iterable):
+    write_strings(path, (json.dumps(record, default=str) for record in records))
+
+
+def load_array(path: str, mode: str = "r") -> np.ndarray:
+    """Memory-map an .npy file; empty arrays cannot be mapped and are read instead"""
+    array = np.load(path, mmap_mode=mode)
+    return array if array.size else np.array(array)
+
+
+def save_database(db: sqlite3.Connection, path: str):
+    """Copy a SQLite database, including an in-memory one, to a file page by page"""
+    target = sqlite3.connect(path)
+    try:
+        db.backup(target)
+    finally:
+        target.close()
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """Open a database written by save_database read-only and memory-mapped.
+
+    Opening is constant-time, and processes serving the same snapshot share
+    its pages through the page cache. Published snapshots never change, so
+    SQLite can skip locking.
+    """
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+    db = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    db.execute(f"PRAGMA mmap_size = {os.path.getsize(path)}")
+    return db
+
+
+def copy_to_memory(db: sqlite3.Connection) -> sqlite3.Connection:
+    """Private in-memory copy of a database, closing the original"""
+    memory = sqlite3.connect(":memory:", check_same_thread=False)
+    try:
+        db.backup(memory)
+    except BaseException:
+        memory.close()
+        raise
+    db.close()
+    return memory
+
+
+def current_generation(root: str) -> Optional[str]:
+    """Directory of the most recently published snapshot under root, if any"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as handle:
+            name = handle.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(root, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def new_generation(root: str) -> str:
+    """Create an empty directory for a snapshot that is not yet visible to readers"""
+    path = os.path.join(root, f"gen-{time.time_ns()}")
+    os.makedirs(path)
+    return path
+
+
+def publish_generation(root: str, path: str):
+    """Atomically make `path` the current snapshot and remove older generations.
+
+    Processes that still map files of an old generation keep working; the
+    data stays alive until they unmap it.
+    """
+    name = os.path.basename(path)
+    current = current_generation(root)
+    if current and _generation_time(os.path.basename(current)) > _generation_time(name):
+        # Another process published a newer snapshot while this one was written
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    pointer = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer, "w") as handle:
+        handle.write(name)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+    # Newer generations may belong to another process still writing its snapshot
+    for entry in os.listdir(root):
+        if entry.startswith("gen-") and _generation_time(entry) < _generation_time(name):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def _generation_time(name: str) -> int:
+    try:
+        return int(name[len("gen-"):])
+    except ValueError:
+        return -1
@@ -0,0 +1,136 @@
+"""
+Precomputed k-nearest-neighbour graph over technology centroid embeddings
+"""
+import json
+import os
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class TechnologySimilarityGraph:
+    """Keeps each technology's k most similar technologies up to date.
+
+    A technology is represented by the normalized mean of its knowledge
+    chunk embeddings. Updating one technology costs one pass over the
+    centroid matrix plus a recompute for the technologies that listed it as
+    a neighbour; lookups are a read of the stored neighbour list.
+    """
+
+    def __init__(self, dimension: int, k: int = 10):
+        self.dimension = dimension
+        self.k = k
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._centroids = np.zeros((0, dimension), dtype=np.float32)
+        self._neighbors: Dict[str, List[Tuple[str, float]]] = {}
+
+    def __contains__(self, tech_name: str) -> bool:
+        return tech_name in self._rows
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def update(self, tech_name: str, vectors: List[List[float]]):
+        """Set a technology's centroid from its chunk embeddings and repair affected neighbour lists"""
+        if not vectors:
+            self.remove(tech_name)
+            return
+
+        centroid = np.asarray(vectors, dtype=np.float32).mean(axis=0)
+        centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+
+        row = self._rows.get(tech_name)
+        if row is None:
+            row = len(self._names)
+            self._rows[tech_name] = row
+            self._names.append(tech_name)
+            self._centroids = np.vstack([self._centroids, centroid[None, :]])
+        else:
+            self._centroids[row] = centroid
+
+        similarities = self._centroids @ centroid
+        self._neighbors[tech_name] = self._top_k(similarities, exclude=row)
+
+        for other, other_row in self._rows.items():
+            if other == tech_name:
+                continue
+            neighbors = self._neighbors.get(other, [])
+            similarity = float(similarities[other_row])
+            if any(name == tech_name for name, _ in neighbors):
+                # Its similarity may have dropped, so the list must be rebuilt
+                self._neighbors[other] = self._top_k(self._centroids @ self._centroids[other_row], exclude=other_row)
+            elif len(neighbors) < self.k or similarity > neighbors[-1][1]:
+                neighbors = sorted(neighbors + [(tech_name, similarity)], key=lambda item: item[1], reverse=True)
+                self._neighbors[other] = neighbors[:self.k]
+
+    def remove(self, tech_name: str):
+        """Drop a technology and rebuild the lists that referenced it"""
+        row = self._rows.pop(tech_name, None)
+        if row is None:
+            return
+
+        last = len(self._names) - 1
+        if row != last:
+            moved = self._names[last]
+            self._names[row] = moved
+            self._rows[moved] = row
+            self._centroids[row] = self._centroids[last]
+        self._names.pop()
+        self._centroids = self._centroids[:last]
+        self._neighbors.pop(tech_name, None)
+
+        for other, neighbors in self._neighbors.items():
+            if any(name == tech_name for name, _ in neighbors):
+                other_row = self._rows[other]
+                self._neighbors[other] = self._top_k(self._centroids @ self._centroids[other_row], exclude=other_row)
+
+    def similar(self, tech_name: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Most similar technologies with their cosine similarity, best first"""
+        return list(self._neighbors.get(tech_name, [])[:limit or self.k])
+
+    def _top_k(self, similarities: np.ndarray, exclude: int) -> List[Tuple[str, float]]:
+        similarities = similarities.copy()
+        similarities[exclude] = -np.inf
+        count = min(self.k, len(similarities) - 1)
+        if count <= 0:
+            return []
+        candidates = np.argpartition(-similarities, count - 1)[:count]
+        ranked = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        return [(self._names[row], float(similarities[row])) for row in ranked]
+
+    def save(self, directory: str):
+        """Write centroids and neighbour lists to a directory, replacing each file atomically"""
+        os.makedirs(directory, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        centroids = os.path.join(directory, "tech_centroids.npy")
+        with open(centroids + suffix, "wb") as handle:
+            np.save(handle, self._centroids)
+        os.replace(centroids + suffix, centroids)
+        graph = os.path.join(directory, "tech_graph.json")
+        with open(graph + suffix, "w") as handle:
+            json.dump({"k": self.k, "names": self._names, "neighbors": self._neighbors}, handle)
+        os.replace(graph + suffix, graph)
+
+    def load(self, directory: str):
+        """Restore a graph written by save(), recomputing neighbour lists if k changed"""
+        with open(os.path.join(directory, "tech_graph.json")) as handle:
+            state = json.load(handle)
+        centroids = np.load(os.path.join(directory, "tech_centroids.npy"))
+        if centroids.shape != (len(state["names"]), self.dimension):
+            raise ValueError(f"Technology graph in {directory} does not match its centroids")
+        self._centroids = centroids
+        self._names = state["names"]
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._neighbors = {
+            name: [(other, similarity) for other, similarity in neighbors]
+            for name, neighbors in state["neighbors"].items()
+        }
+        if state["k"] != self.k:
+            self._neighbors = {
+                name: self._top_k(self._centroids @ self._centroids[row], exclude=row)
+                for name, row in self._rows.items()
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"technologies": len(self._names), "k": self.k}
@@ -2,7 +2,14 @@
 Vector Service using Pinecone for semantic search and document indexing
 """
 import os
-from typing import List, Dict, Any, Optional
+import re
+import asyncio
+import multiprocessing
+import shutil
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, List, Dict, Any, Optional
 try:
     from pinecone import Pinecone, ServerlessSpec
 except ImportError:
@@ -12,110 +19,679 @@ from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 
+from config.settings import settings
 from models.responses import SearchResult
+from services.dedup import SimHashIndex, dedup_scope
+from services.index_manifest import IndexManifest
+from services.preprocessing import preprocess_documents, normalize_content
+from services.lexical_index import LexicalIndex
+from services.result_cache import SearchResultCache
+from services.snapshot import current_generation, new_generation, publish_generation
+from services.tech_graph import TechnologySimilarityGraph
+from services.embedding_cache import EmbeddingCache, CachedEmbeddings
+from services.query_batcher import EmbeddingMicroBatcher
+from services.vector_store import VectorStore, VectorMatch, PineconeVectorStore, LocalVectorStore
+from services.sharded_store import ShardedVectorStore
 
 
 class VectorService:
-    """Service for vector operations using Pinecone"""
+    """Service for vector operations over a pluggable vector store"""
     
     def __init__(self):
         self.pc = None
-        self.index = None
-        self.embeddings = OpenAIEmbeddings(
-            api_key=os.getenv("OPENAI_API_KEY")
-        ) if os.getenv("OPENAI_API_KEY") else None
+        self.store: Optional[VectorStore] = None
+        self.embeddings = None
+        self.embedding_cache = None
+        self.query_batcher = None
+        if os.getenv("OPENAI_API_KEY"):
+            embeddings = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
+            # Identical text under the same model is only ever embedded once
+            self.embedding_cache = EmbeddingCache(
+                model=getattr(embeddings, "model", "default"),
+                max_entries=settings.embedding_cache_size,
+                path=settings.embedding_cache_path or None
+            )
+            self.embeddings = CachedEmbeddings(embeddings, self.embedding_cache)
+            # Concurrent searches share one batched embedding call
+            self.query_batcher = EmbeddingMicroBatcher(
+                self.embeddings,
+                window_ms=settings.query_batch_window_ms,
+                max_batch_size=settings.query_batch_max_size
+            )
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap
+        )
+        self.index_name = settings.pinecone_index_name
+        self.manifest: Optional[IndexManifest] = None
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.tech_graph = TechnologySimilarityGraph(
+            dimension=settings.embedding_dimension,
+            k=settings.tech_graph_k
+        )
+        self.result_cache = SearchResultCache(
+            max_entries=settings.search_cache_size,
+            ttl_seconds=settings.search_cache_ttl_seconds
         )
-        self.index_name = "tech-stack-knowledge"
+        # Store clients may be synchronous; run their calls off the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.upsert_max_workers,
+            thread_name_prefix="vector-store"
+        )
+        # Created on first large ingest; chunking big documents must not stall the event loop
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # Snapshots wait for in-flight writes and hold off new ones while they are written
+        self._snapshot_lock = asyncio.Lock()
+        self._writes_idle = asyncio.Event()
+        self._writes_idle.set()
+        self._active_writes = 0
+        self._dedup_stats = {"checked": 0, "duplicates": 0}
+        # Serializes graph updates with the writes that persist them
+        self._tech_graph_lock = asyncio.Lock()
+        # Set when the manifest was lost while the remote index kept its vectors;
+        # each (namespace, doc_id) is looked up in the index at most once
+        self._recover_manifest = False
+        self._recovered_docs = set()
+        self._recovery_stats = {"lookups": 0, "recovered_chunks": 0}
     
     async def initialize(self):
-        """Initialize Pinecone connection and index"""
+        """Initialize the configured vector store backend"""
+        if settings.vector_backend == "local":
+            self._reset_local_state()
+            if settings.snapshot_path:
+                await asyncio.to_thread(self._load_snapshot)
+            print("Using local in-process vector store")
+            return
+        
         try:
-            self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+            self.pc = Pinecone(api_key=settings.pinecone_api_key or os.getenv("PINECONE_API_KEY"))
             
             # Check if index exists, create if not
             if self.index_name not in self.pc.list_indexes().names():
                 self.pc.create_index(
                     name=self.index_name,
-                    dimension=1536,  # OpenAI embeddings dimension
+                    dimension=settings.embedding_dimension,
                     metric="cosine",
                     spec=ServerlessSpec(
                         cloud="aws",
-                        region="us-east-1"
+                        region=settings.pinecone_environment
                     )
                 )
             
-            self.index = self.pc.Index(self.index_name)
+            self.store = PineconeVectorStore(self.pc.Index(self.index_name))
+            self.manifest = IndexManifest(settings.index_manifest_path or None)
+            self.lexical_index = LexicalIndex(settings.lexical_index_path or None)
+            if self.manifest.is_empty() and await asyncio.to_thread(self.store.count) > 0:
+                # The index outlived the local state under .cache/; look up the
+                # chunks of documents the manifest does not know while indexing
+                self._recover_manifest = True
+                print(
+                    f"Index manifest is empty but Pinecone index {self.index_name} is not; "
+                    "keep .cache on a persistent volume. Re-index documents to rebuild "
+                    "the manifest and keyword index."
+                )
+            if settings.tech_graph_path:
+                await asyncio.to_thread(self._load_tech_graph)
             print(f"Connected to Pinecone index: {self.index_name}")
             
         except Exception as e:
             print(f"Failed to initialize Pinecone: {e}")
             # Continue without Pinecone for now
             self.pc = None
-            self.index = None
+            self.store = None
+    
+    def _reset_local_state(self):
+        """Start the local backend empty"""
+        if self.store is not None:
+            self.store.close()
+        store_options = dict(
+            dimension=settings.embedding_dimension,
+            index_mode=settings.local_index_mode,
+            ivf_nlist=settings.ivf_nlist,
+            ivf_nprobe=settings.ivf_nprobe,
+            ivf_train_threshold=settings.ivf_train_threshold,
+            storage_dtype=settings.local_storage_dtype,
+            rescore=settings.local_rescore,
+            rescore_multiplier=settings.local_rescore_multiplier,
+            rescore_directory=settings.local_rescore_path
+        )
+        if settings.local_shards > 1:
+            # Each shard searches in its own process, so queries are not bound to one core
+            self.store = ShardedVectorStore(
+                settings.local_shards, shard_by=settings.local_shard_by, **store_options
+            )
+        else:
+            self.store = LocalVectorStore(**store_options)
+        # The manifest and keyword index describe the local store, so they
+        # live in memory and are only persisted as part of a snapshot; a
+        # loaded snapshot's files are read in place until the first write
+        self.manifest = IndexManifest()
+        self.lexical_index = LexicalIndex()
+        self.tech_graph = TechnologySimilarityGraph(
+            dimension=settings.embedding_dimension,
+            k=settings.tech_graph_k
+        )
+    
+    def _load_tech_graph(self):
+        """Restore the similarity graph saved alongside the Pinecone backend's other local state"""
+        if not os.path.exists(os.path.join(settings.tech_graph_path, "tech_graph.json")):
+            return
+        try:
+            self.tech_graph.load(settings.tech_graph_path)
+        except Exception as e:
+            print(f"Failed to load technology graph: {e}")
+            self.tech_graph = TechnologySimilarityGraph(
+                dimension=settings.embedding_dimension,
+                k=settings.tech_graph_k
+            )
     
-    async def index_documents(self, documents: List[Dict[str, Any]], namespace: Optional[str] = None) -> int:
-        """Index documents into Pinecone"""
-        if not self.index:
-            raise Exception("Pinecone not initialized")
+    def _load_snapshot(self):
+        """Map the latest local index snapshot, if there is a compatible one"""
+        directory = current_generation(settings.snapshot_path)
+        if directory is None:
+            return
+        try:
+            if not self.store.load_snapshot(directory):
+                print(f"Ignoring snapshot {directory}: written with different vector store settings")
+                return
+            self.manifest.load(os.path.join(directory, "manifest.sqlite3"))
+            self.lexical_index.load(os.path.join(directory, "lexical.sqlite3"))
+            self.tech_graph.load(directory)
+            print(f"Loaded index snapshot {directory}")
+        except Exception as e:
+            print(f"Failed to load snapshot {directory}: {e}")
+            self._reset_local_state()
+    
+    async def save_snapshot(self) -> Optional[str]:
+        """Persist the local index as a new memory-mappable snapshot.
         
-        vectors = []
+        Returns the snapshot directory, or None when snapshots are disabled
+        or the backend keeps its own state.
+        """
+        if not self._is_local() or not settings.snapshot_path:
+            return None
+        async with self._snapshot_lock:
+            await self._writes_idle.wait()
+            return await asyncio.to_thread(self._save_snapshot)
+    
+    def _save_snapshot(self) -> str:
+        root = settings.snapshot_path
+        os.makedirs(root, exist_ok=True)
+        directory = new_generation(root)
+        try:
+            self.store.save_snapshot(directory)
+            self.manifest.save(os.path.join(directory, "manifest.sqlite3"))
+            self.lexical_index.save(os.path.join(directory, "lexical.sqlite3"))
+            self.tech_graph.save(directory)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        publish_generation(root, directory)
+        return directory
+    
+    def _is_local(self) -> bool:
+        return isinstance(self.store, (LocalVectorStore, ShardedVectorStore))
+    
+    def close(self):
+        """Stop shard and preprocessing worker processes"""
+        if self.store is not None:
+            self.store.close()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
+    
+    @asynccontextmanager
+    async def _write_gate(self):
+        """Mark a write in progress so a snapshot never captures it half-applied"""
+        async with self._snapshot_lock:
+            self._active_writes += 1
+            self._writes_idle.clear()
+        try:
+            yield
+        finally:
+            self._active_writes -= 1
+            if not self._active_writes:
+                self._writes_idle.set()
+    
+    async def _run_in_executor(self, func, *args, **kwargs):
+        """Run a blocking vector store call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def index_documents(self, documents: List[Dict[str, Any]], namespace: Optional[str] = None) -> Dict[str, int]:
+        """Incrementally index documents into the vector store.
         
-        for doc_data in documents:
-            # Extract text content
-            text_content = doc_data.get('content', '')
-            metadata = doc_data.get('metadata', {})
-            doc_id = doc_data.get('id', f"doc_{len(vectors)}")
+        Only new or changed chunks are embedded and upserted; chunks a document
+        no longer has are deleted. New or changed chunks that are near-duplicates
+        of an indexed chunk are skipped. Returns added/updated/unchanged/deleted
+        counts plus the number of duplicates skipped.
+        """
+        if not self.store:
+            raise Exception("Vector store not initialized")
+        
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "duplicates": 0}
+        doc_chunks: Dict[str, Dict[str, str]] = {}
+        fingerprints: Dict[str, tuple] = {}
+        stale: List[str] = []
+        # Chunks accepted earlier in this request; the manifest only learns about them at the end
+        request_index = SimHashIndex()
+        
+        async def changed_records():
+            # Chunks stream in from preprocessing and only new or changed ones
+            # go on to the embedding stage
+            record_count = 0
+            async for group in self._preprocess(documents):
+                group_records = []
+                doc_ids = []
+                for doc_id, metadata, chunks in group:
+                    if doc_id is None:
+                        doc_id = f"doc_{record_count}"
+                    record_count += len(chunks)
+                    doc_ids.append(doc_id)
+                    doc_chunks[doc_id] = {}
+                    for i, (chunk, digest, simhash) in enumerate(chunks):
+                        doc_chunks[doc_id][f"{doc_id}_chunk_{i}"] = digest
+                        group_records.append((doc_id, i, chunk, metadata, simhash))
+                
+                # Compare against what each document owned the last time it was indexed
+                previous = await asyncio.to_thread(self.manifest.get, namespace, list(dict.fromkeys(doc_ids)))
+                if self._recover_manifest:
+                    await self._recover_previous(previous, namespace)
+                
+                changed = []
+                for record in group_records:
+                    chunk_id = f"{record[0]}_chunk_{record[1]}"
+                    old_hash = previous[record[0]].get(chunk_id)
+                    if old_hash is None:
+                        stats["added"] += 1
+                        changed.append(record)
+                    elif old_hash != doc_chunks[record[0]][chunk_id]:
+                        stats["updated"] += 1
+                        changed.append(record)
+                    else:
+                        stats["unchanged"] += 1
+                
+                if settings.dedup_enabled and changed:
+                    changed = await self._drop_near_duplicates(
+                        changed, namespace, previous, doc_chunks, fingerprints, request_index, stale, stats
+                    )
+                
+                stale.extend(
+                    chunk_id
+                    for doc_id, chunks in previous.items()
+                    for chunk_id in chunks
+                    if chunk_id not in doc_chunks[doc_id]
+                )
+                if changed:
+                    yield changed
+        
+        indexed = 0
+        async with self._write_gate():
+            try:
+                indexed = await self._write_records(changed_records(), namespace)
+                if stale:
+                    # Chunks recorded as near-duplicates were never stored
+                    not_stored = await asyncio.to_thread(self.manifest.duplicates, namespace, stale)
+                    stale = [chunk_id for chunk_id in stale if chunk_id not in not_stored]
+                stats["deleted"] = len(stale)
+                if stale:
+                    await self._run_in_executor(self.store.delete, stale, namespace=namespace)
+                    await self._run_in_executor(self.lexical_index.delete, stale, namespace=namespace)
+            finally:
+                # Even a partially applied write makes cached results for the namespace stale
+                if stats["added"] or stats["updated"] or stale:
+                    self.result_cache.invalidate(namespace)
             
-            # Split text into chunks
-            chunks = self.text_splitter.split_text(text_content)
+            # Only record the new state once the store reflects it
+            await asyncio.to_thread(self.manifest.replace, namespace, doc_chunks, fingerprints)
+        
+        return {"indexed_count": indexed, **stats}
+    
+    async def _recover_previous(self, previous: Dict[str, Dict[str, str]], namespace: Optional[str]):
+        """Fill in stored chunks for documents missing from a lost manifest.
+        
+        Recovered chunks get an empty hash, so they are written again as
+        updates and any the document no longer has are deleted. Documents
+        looked up once are recorded in the manifest by the same request, so
+        later requests skip them.
+        """
+        lookups = 0
+        recovered = 0
+        for doc_id, chunks in previous.items():
+            key = (namespace or "", doc_id)
+            if chunks or key in self._recovered_docs:
+                continue
+            prefix = f"{doc_id}_chunk_"
+            pattern = re.compile(re.escape(prefix) + r"\d+")
+            stored = await self._run_in_executor(self.store.list_ids, prefix, namespace=namespace)
+            chunks.update((chunk_id, "") for chunk_id in stored if pattern.fullmatch(chunk_id))
+            self._recovered_docs.add(key)
+            lookups += 1
+            recovered += len(chunks)
+        
+        if lookups:
+            self._recovery_stats["lookups"] += lookups
+            self._recovery_stats["recovered_chunks"] += recovered
+            print(
+                f"Manifest recovery: looked up {lookups} document(s) in Pinecone, "
+                f"recovered {recovered} chunk(s); {len(self._recovered_docs)} document(s) checked so far"
+            )
+    
+    async def _drop_near_duplicates(self, records: List[tuple], namespace: Optional[str],
+                                    previous: Dict[str, Dict[str, str]], doc_chunks: Dict[str, Dict[str, str]],
+                                    fingerprints: Dict[str, tuple], request_index: SimHashIndex,
+                                    stale: List[str], stats: Dict[str, int]) -> List[tuple]:
+        """Filter out records whose SimHash is within the dedup distance of an indexed chunk in the same scope"""
+        max_distance = settings.dedup_max_hamming_distance
+        scopes = {f"{record[0]}_chunk_{record[1]}": dedup_scope(record[3]) for record in records}
+        candidates = await asyncio.to_thread(
+            self.manifest.near_duplicates,
+            namespace,
+            {chunk_id: (fingerprint, scopes[chunk_id]) for chunk_id, fingerprint in
+             ((f"{record[0]}_chunk_{record[1]}", record[4]) for record in records)},
+            max_distance
+        )
+        
+        kept = []
+        for record in records:
+            chunk_id = f"{record[0]}_chunk_{record[1]}"
+            scope = scopes[chunk_id]
+            # A manifest chunk only counts if this request is not replacing it
+            canonical = next(
+                (
+                    candidate_id
+                    for candidate_id, doc_id, digest in candidates[chunk_id]
+                    if doc_id not in doc_chunks or doc_chunks[doc_id].get(candidate_id) == digest
+                ),
+                None
+            ) or request_index.nearest(record[4], max_distance, scope)
             
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = await self.embeddings.aembed_query(chunk)
+            fingerprints[chunk_id] = (record[4], canonical, scope)
+            if canonical is None:
+                request_index.add(chunk_id, record[4], scope)
+                kept.append(record)
+                continue
+            stats["duplicates"] += 1
+            if chunk_id in previous[record[0]]:
+                # Its earlier version is now represented by the canonical chunk
+                stale.append(chunk_id)
+        
+        self._dedup_stats["checked"] += len(records)
+        self._dedup_stats["duplicates"] += len(records) - len(kept)
+        return kept
+    
+    async def _preprocess(self, documents: List[Dict[str, Any]]) -> AsyncIterator[List[tuple]]:
+        """Normalize, chunk and hash documents, yielding groups in input order.
+        
+        Small requests are processed on a worker thread; large ones are spread
+        over a process pool with a bounded number of groups in flight.
+        """
+        total_chars = sum(len(doc.get('content', '')) for doc in documents)
+        if total_chars <= settings.preprocess_inline_max_chars:
+            # Off the event loop, but without the cost of shipping text to a process
+            yield await asyncio.to_thread(
+                preprocess_documents,
+                documents, settings.chunk_size, settings.chunk_overlap, settings.dedup_enabled
+            )
+            return
+        
+        workers = settings.preprocess_workers or os.cpu_count() or 1
+        if self._process_pool is None:
+            # spawn rather than fork: the parent already runs threads and open SQLite handles
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        
+        groups = []
+        current = []
+        current_chars = 0
+        for doc in documents:
+            current.append(doc)
+            current_chars += len(doc.get('content', ''))
+            if current_chars >= settings.preprocess_group_chars:
+                groups.append(current)
+                current = []
+                current_chars = 0
+        if current:
+            groups.append(current)
+        
+        loop = asyncio.get_running_loop()
+        window = workers * 2
+        in_flight = []
+        try:
+            for group in groups:
+                in_flight.append(loop.run_in_executor(
+                    self._process_pool,
+                    preprocess_documents,
+                    group,
+                    settings.chunk_size,
+                    settings.chunk_overlap,
+                    settings.dedup_enabled
+                ))
+                if len(in_flight) >= window:
+                    yield await in_flight.pop(0)
+            while in_flight:
+                yield await in_flight.pop(0)
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    async def _write_records(self, record_batches: AsyncIterator[List[tuple]], namespace: Optional[str]) -> int:
+        """Embed chunk records and upsert them, returning the number written"""
+        # Embedding and upserting run as two pipeline stages joined by a bounded
+        # queue, so vectors are uploaded as soon as they exist and never pile up
+        queue = asyncio.Queue(maxsize=settings.upsert_queue_size)
+        producer = asyncio.create_task(self._embed_into_queue(record_batches, queue))
+        consumer = asyncio.create_task(self._upsert_from_queue(queue, namespace))
+        
+        try:
+            done, _ = await asyncio.wait(
+                {producer, consumer},
+                return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            return await consumer
+        finally:
+            # Tear down the other stage on failure or if the caller is cancelled
+            for task in (producer, consumer):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(producer, consumer, return_exceptions=True)
+    
+    def _make_batches(self, chunks: List[str]) -> List[List[str]]:
+        """Group chunks into batches bounded by item count and approximate token count"""
+        batches = []
+        current = []
+        current_tokens = 0
+        
+        for chunk in chunks:
+            # Rough token estimate (~4 characters per token) is enough for bounding
+            tokens = len(chunk) // 4 + 1
+            if current and (
+                len(current) >= settings.embedding_batch_size
+                or current_tokens + tokens > settings.embedding_batch_max_tokens
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(chunk)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    async def _embed_into_queue(self, record_batches: AsyncIterator[List[tuple]], queue: asyncio.Queue):
+        """Embed streamed chunk records in bounded concurrent batches and hand vectors to the upsert stage"""
+        semaphore = asyncio.Semaphore(max(1, settings.embedding_max_concurrency))
+        in_flight = set()
+        errors = []
+        
+        async def embed_batch(batch: List[tuple]):
+            try:
+                embeddings = await self.embeddings.aembed_documents([record[2] for record in batch])
                 
-                # Prepare vector
-                vector = {
-                    "id": f"{doc_id}_chunk_{i}",
-                    "values": embedding,
-                    "metadata": {
-                        **metadata,
-                        "content": chunk,
-                        "chunk_index": i,
-                        "parent_doc_id": doc_id
-                    }
-                }
-                vectors.append(vector)
+                vectors = []
+                for (doc_id, i, chunk, metadata, _), embedding in zip(batch, embeddings):
+                    # Prepare vector
+                    vectors.append({
+                        "id": f"{doc_id}_chunk_{i}",
+                        "values": embedding,
+                        "metadata": {
+                            **metadata,
+                            "content": chunk,
+                            "chunk_index": i,
+                            "parent_doc_id": doc_id
+                        }
+                    })
+                
+                # Blocks while the upsert stage is saturated, which keeps memory bounded
+                await queue.put(vectors)
+            finally:
+                semaphore.release()
         
-        # Upsert vectors to Pinecone
-        if vectors:
-            self.index.upsert(vectors=vectors, namespace=namespace)
+        def on_done(task: asyncio.Task):
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
         
-        return len(vectors)
+        async def launch(batch: List[tuple]):
+            # Waiting for a slot here also stops pulling more chunks from preprocessing
+            await semaphore.acquire()
+            if errors:
+                semaphore.release()
+                raise errors[0]
+            task = asyncio.create_task(embed_batch(batch))
+            in_flight.add(task)
+            task.add_done_callback(on_done)
+        
+        buffer = []
+        try:
+            async for records in record_batches:
+                buffer.extend(records)
+                # Batch across incoming groups; keep the trailing partial batch for later
+                batches = self._make_batches([record[2] for record in buffer])
+                offset = 0
+                for texts in batches[:-1]:
+                    await launch(buffer[offset:offset + len(texts)])
+                    offset += len(texts)
+                buffer = buffer[offset:]
+            
+            if buffer:
+                await launch(buffer)
+            
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            if errors:
+                raise errors[0]
+        except BaseException:
+            for task in list(in_flight):
+                task.cancel()
+            raise
+        
+        await queue.put(None)
     
-    async def search(self, query: str, limit: int = 10, namespace: Optional[str] = None) -> List[SearchResult]:
-        """Perform semantic search"""
-        if not self.index:
-            # Return empty results if Pinecone not available
-            return []
+    async def _upsert_from_queue(self, queue: asyncio.Queue, namespace: Optional[str]) -> int:
+        """Drain embedded vectors from the queue and upsert them in fixed-size batches"""
+        semaphore = asyncio.Semaphore(max(1, settings.upsert_max_workers))
+        in_flight = set()
+        errors = []
+        buffer = []
+        upserted = 0
+        
+        async def upsert_batch(batch: List[Dict[str, Any]]):
+            try:
+                await self._run_in_executor(self.store.upsert, batch, namespace=namespace)
+                await self._run_in_executor(self.lexical_index.upsert, batch, namespace=namespace)
+            finally:
+                semaphore.release()
+        
+        def on_done(task: asyncio.Task):
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
+        
+        async def flush(batch: List[Dict[str, Any]]):
+            await semaphore.acquire()
+            # Fail fast instead of uploading the rest after a rejected batch
+            if errors:
+                semaphore.release()
+                raise errors[0]
+            task = asyncio.create_task(upsert_batch(batch))
+            in_flight.add(task)
+            task.add_done_callback(on_done)
         
         try:
-            # Generate query embedding
-            query_embedding = await self.embeddings.aembed_query(query)
+            while True:
+                vectors = await queue.get()
+                if vectors is None:
+                    break
+                
+                buffer.extend(vectors)
+                while len(buffer) >= settings.upsert_batch_size:
+                    batch = buffer[:settings.upsert_batch_size]
+                    buffer = buffer[settings.upsert_batch_size:]
+                    upserted += len(batch)
+                    await flush(batch)
             
-            # Search in Pinecone
-            search_results = self.index.query(
-                vector=query_embedding,
-                top_k=limit,
-                include_metadata=True,
-                namespace=namespace
-            )
+            if buffer:
+                upserted += len(buffer)
+                await flush(buffer)
+            
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            # Surface the first upsert failure, if any
+            if errors:
+                raise errors[0]
+        except BaseException:
+            for task in list(in_flight):
+                task.cancel()
+            raise
+        
+        return upserted
+    
+    async def search(self, query: str, limit: int = 10, namespace: Optional[str] = None,
+                     filters: Optional[Dict[str, Any]] = None, mode: str = "vector",
+                     query_embedding: Optional[List[float]] = None) -> List[SearchResult]:
+        """Search chunks by meaning, by keywords, or both fused with reciprocal rank fusion.
+        
+        mode is "vector" (dense only), "lexical" (BM25 only, no embedding call)
+        or "hybrid" (both retrievers run concurrently). Hybrid scores are fused
+        rank scores, not similarities. Metadata filters are applied inside each
+        retriever. A precomputed query_embedding skips the embedding call.
+        """
+        if mode not in ("vector", "lexical", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        if not self.store:
+            # Return empty results if no vector store is available
+            return []
+        
+        cache_key = self.result_cache.key(query, limit, namespace, filters, mode)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        # Captured up front so a write that lands mid-search keeps this result out of the cache
+        generation = self.result_cache.generation(namespace)
+        
+        try:
+            if mode == "vector":
+                matches = await self._vector_matches(query, limit, namespace, filters, query_embedding)
+            elif mode == "lexical":
+                matches = await self._lexical_matches(query, limit, namespace, filters)
+            elif mode == "hybrid":
+                # Fetch deeper candidate lists so fusion has overlap to work with
+                depth = limit * settings.hybrid_candidate_multiplier
+                dense, lexical = await asyncio.gather(
+                    self._vector_matches(query, depth, namespace, filters, query_embedding),
+                    self._lexical_matches(query, depth, namespace, filters)
+                )
+                matches = self._fuse([dense, lexical])[:limit]
             
             # Convert to SearchResult objects
             results = []
-            for match in search_results.matches:
+            for match in matches:
                 result = SearchResult(
                     id=match.id,
                     content=match.metadata.get('content', ''),
@@ -124,12 +700,86 @@ class VectorService:
                 )
                 results.append(result)
             
+            self.result_cache.put(cache_key, results, generation)
             return results
             
         except Exception as e:
             print(f"Search error: {e}")
             return []
     
+    async def search_batch(self, queries: List[Dict[str, Any]]) -> List[List[SearchResult]]:
+        """Run several searches with one batched embedding call, returning results in input order.
+        
+        Each query is a dict with "query" and optional "limit", "namespace",
+        "filters" and "mode" keys, matching the arguments of search.
+        """
+        if not self.store:
+            return [[] for _ in queries]
+        
+        # Only queries that reach the dense retriever need an embedding
+        texts = list(dict.fromkeys(
+            query["query"] for query in queries
+            if (query.get("mode") or "vector") != "lexical"
+        ))
+        embeddings: Dict[str, List[float]] = {}
+        if texts:
+            try:
+                vectors = await self.embeddings.aembed_documents(texts)
+                embeddings = dict(zip(texts, vectors))
+            except Exception as e:
+                # Fall back to embedding inside each search
+                print(f"Batch embedding error: {e}")
+        
+        return await asyncio.gather(*(
+            self.search(
+                query["query"],
+                query.get("limit") or 10,
+                namespace=query.get("namespace"),
+                filters=query.get("filters"),
+                mode=query.get("mode") or "vector",
+                query_embedding=embeddings.get(query["query"])
+            )
+            for query in queries
+        ))
+    
+    async def _vector_matches(self, query: str, limit: int, namespace: Optional[str],
+                              filters: Optional[Dict[str, Any]],
+                              query_embedding: Optional[List[float]] = None) -> List[VectorMatch]:
+        # Generate query embedding
+        if query_embedding is None:
+            query_embedding = await self.query_batcher.embed(query)
+        
+        # Search in the vector store
+        return await self._run_in_executor(
+            self.store.query,
+            query_embedding,
+            limit,
+            namespace=namespace,
+            filters=filters
+        )
+    
+    async def _lexical_matches(self, query: str, limit: int, namespace: Optional[str],
+                               filters: Optional[Dict[str, Any]]) -> List[VectorMatch]:
+        return await self._run_in_executor(
+            self.lexical_index.search,
+            query,
+            limit,
+            namespace=namespace,
+            filters=filters
+        )
+    
+    def _fuse(self, rankings: List[List[VectorMatch]]) -> List[VectorMatch]:
+        """Merge ranked lists with reciprocal rank fusion: score = sum(1 / (k + rank))"""
+        fused: Dict[str, VectorMatch] = {}
+        for ranking in rankings:
+            for rank, match in enumerate(ranking, start=1):
+                contribution = 1.0 / (settings.rrf_k + rank)
+                if match.id in fused:
+                    fused[match.id].score += contribution
+                else:
+                    fused[match.id] = VectorMatch(id=match.id, score=contribution, metadata=match.metadata)
+        return sorted(fused.values(), key=lambda match: match.score, reverse=True)
+    
     async def add_technology_knowledge(self, tech_name: str, knowledge_data: Dict[str, Any]):
         """Add technology-specific knowledge to the vector database"""
         documents = []
@@ -143,25 +793,46 @@ class VectorService:
             ('best_practices', knowledge_data.get('best_practices', ''))
         ]
         
+        # Empty aspects are still sent so incremental indexing removes their old chunks
         for aspect_name, content in aspects:
-            if content:
-                documents.append({
-                    'id': f"{tech_name}_{aspect_name}",
-                    'content': content,
-                    'metadata': {
-                        'technology': tech_name,
-                        'aspect': aspect_name,
-                        'type': 'knowledge'
-                    }
-                })
-        
-        return await self.index_documents(documents)
+            documents.append({
+                'id': f"{tech_name}_{aspect_name}",
+                'content': content,
+                'metadata': {
+                    'technology': tech_name,
+                    'aspect': aspect_name,
+                    'type': 'knowledge'
+                }
+            })
+        
+        result = await self.index_documents(documents)
+        
+        if result["added"] or result["updated"] or result["deleted"] or tech_name not in self.tech_graph:
+            # Aspect chunks were just embedded, so these lookups are embedding cache hits
+            chunks = [
+                chunk
+                for _, content in aspects
+                for chunk in self.text_splitter.split_text(normalize_content(content))
+            ]
+            vectors = await self.embeddings.aembed_documents(chunks) if chunks else []
+            async with self._write_gate(), self._tech_graph_lock:
+                self.tech_graph.update(tech_name, vectors)
+                if not self._is_local() and settings.tech_graph_path:
+                    # Local backends persist the graph in snapshots
+                    await asyncio.to_thread(self.tech_graph.save, settings.tech_graph_path)
+        
+        return result
     
     async def get_similar_technologies(self, tech_name: str, limit: int = 5) -> List[str]:
         """Find technologies similar to the given one"""
+        if tech_name in self.tech_graph:
+            return [name for name, _ in self.tech_graph.similar(tech_name, limit)]
+        
+        # Fall back to semantic search for technologies without indexed knowledge
         search_results = await self.search(
             query=f"technology similar to {tech_name}",
-            limit=limit
+            limit=limit,
+            mode="vector"
         )
         
         similar_techs = []
@@ -170,4 +841,23 @@ class VectorService:
             if tech and tech != tech_name and tech not in similar_techs:
                 similar_techs.append(tech)
         
-        return similar_techs[:limit]
\ No newline at end of file
+        return similar_techs[:limit]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for the vector service caches"""
+        return {
+            "embeddings": self.embedding_cache.stats() if self.embedding_cache else None,
+            "query_batching": self.query_batcher.stats() if self.query_batcher else None,
+            "search_results": self.result_cache.stats(),
+            "technology_graph": self.tech_graph.stats(),
+            "vector_memory": self.store.memory_usage() if self._is_local() else None,
+            "deduplication": {
+                **self._dedup_stats,
+                "dedup_ratio": self._dedup_stats["duplicates"] / self._dedup_stats["checked"]
+                if self._dedup_stats["checked"] else 0.0
+            },
+            "manifest_recovery": {
+                **self._recovery_stats,
+                "documents_checked": len(self._recovered_docs)
+            } if self._recover_manifest else None
+        }
\ No newline at end of file
@@ -0,0 +1,754 @@
+"""
+Vector store backends used by the vector service
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from services.ann_index import IVFIndex
+from services.snapshot import MappedStrings, MappedRecords, write_strings, write_records, load_array
+
+
+@dataclass
+class VectorMatch:
+    """Single nearest-neighbour match returned by a vector store"""
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorStore:
+    """Interface for vector storage backends.
+
+    Methods are synchronous; the vector service runs them on a worker pool.
+    """
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None):
+        """Insert or replace vectors given as {"id", "values", "metadata"} dicts"""
+        raise NotImplementedError
+
+    def query(self, vector: List[float], top_k: int, namespace: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None) -> List[VectorMatch]:
+        """Return the top_k most similar vectors matching the metadata filters, best first.
+
+        Filters map a metadata key to a value (equality) or a list of values
+        (membership); Pinecone-style {"$eq": ...} / {"$in": [...]} also work.
+        """
+        raise NotImplementedError
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None):
+        """Remove vectors by id"""
+        raise NotImplementedError
+
+    def count(self, namespace: Optional[str] = None) -> int:
+        """Number of vectors stored in a namespace"""
+        raise NotImplementedError
+
+    def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        """Ids of stored vectors that start with prefix"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release processes or connections held by the backend"""
+
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a Pinecone index"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None):
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector: List[float], top_k: int, namespace: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None) -> List[VectorMatch]:
+        response = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace,
+            filter=self._translate_filters(filters)
+        )
+        return [
+            VectorMatch(id=match.id, score=match.score, metadata=match.metadata or {})
+            for match in response.matches
+        ]
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None):
+        if ids:
+            self.index.delete(ids=ids, namespace=namespace)
+
+    def count(self, namespace: Optional[str] = None) -> int:
+        """Vectors in a namespace, or in the whole index if namespace is None"""
+        stats = self.index.describe_index_stats()
+        if namespace is None:
+            return stats.total_vector_count
+        summary = stats.namespaces.get(namespace)
+        return summary.vector_count if summary else 0
+
+    def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        ids = []
+        for page in self.index.list(prefix=prefix, namespace=namespace):
+            ids.extend(page)
+        return ids
+
+    def _translate_filters(self, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Convert shorthand filters into Pinecone's metadata filter syntax"""
+        if not filters:
+            return None
+        translated = {}
+        for key, condition in filters.items():
+            if isinstance(condition, dict):
+                translated[key] = condition
+            elif isinstance(condition, (list, tuple, set)):
+                translated[key] = {"$in": list(condition)}
+            else:
+                translated[key] = {"$eq": condition}
+        return translated
+
+
+def filter_values(condition: Any) -> List[Any]:
+    """Accepted values for one filter condition"""
+    if isinstance(condition, dict):
+        if set(condition) == {"$eq"}:
+            return [condition["$eq"]]
+        if set(condition) == {"$in"}:
+            return list(condition["$in"])
+        raise ValueError(f"Unsupported filter operator: {condition}")
+    if isinstance(condition, (list, tuple, set)):
+        return list(condition)
+    return [condition]
+
+
+def _indexable_values(value: Any) -> List[Any]:
+    """Metadata values that can be matched by a filter (list values match per element)"""
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [item for item in values if isinstance(item, (str, int, float, bool))]
+
+
+# Free text is never filtered on, so it is kept out of the inverted index
+UNINDEXED_METADATA_KEYS = {"content"}
+
+# Scan matrix element types for the local store
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+class _LocalNamespace:
+    """Row storage for one namespace of the local store"""
+
+    def __init__(self, dimension: int, ann: Optional[IVFIndex] = None, capacity: int = 1024,
+                 storage_dtype: str = "float32", full_directory: Optional[str] = None):
+        self.matrix = np.zeros((capacity, dimension), dtype=STORAGE_DTYPES[storage_dtype])
+        # int8 rows are stored as round(v / scale) with one float32 scale per row
+        self.scales = np.ones(capacity, dtype=np.float32) if storage_dtype == "int8" else None
+        # Full-precision copy of quantized rows for rescoring. It lives in a
+        # memory-mapped file under full_directory, so only the few rows each
+        # rescore reads are paged in
+        self.full_directory = full_directory if storage_dtype != "float32" else None
+        self.full = self._disk_array(capacity, dimension) if self.full_directory else None
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.ann = ann
+        # Inverted index: metadata key -> value -> rows holding that value
+        self.postings: Dict[str, Dict[Any, set]] = {}
+        # Sorted row arrays materialized from postings, dropped when a posting changes
+        self._posting_arrays: Dict[tuple, np.ndarray] = {}
+        # Set while the namespace is served straight from a mapped snapshot
+        self._mapped_postings: Optional[Dict[tuple, np.ndarray]] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def reserve(self, size: int):
+        """Grow the matrix geometrically so appends stay amortized O(1)"""
+        capacity = self.matrix.shape[0]
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        self.matrix = self._grow(self.matrix, capacity)
+        if self.scales is not None:
+            self.scales = self._grow(self.scales, capacity)
+        if self.full is not None:
+            full = self._disk_array(capacity, self.full.shape[1])
+            full[:self.size] = self.full[:self.size]
+            self.full = full
+
+    def _grow(self, array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+        grown[:self.size] = array[:self.size]
+        return grown
+
+    def _disk_array(self, capacity: int, dimension: int) -> np.ndarray:
+        """float32 rows backed by a new file in full_directory"""
+        handle, path = tempfile.mkstemp(suffix=".npy", dir=self.full_directory)
+        os.close(handle)
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(capacity, dimension))
+        try:
+            # The mapping keeps the data; the file goes away with it
+            os.remove(path)
+        except OSError:
+            pass
+        return array
+
+    def encode(self, vectors: np.ndarray):
+        """Convert normalized float32 rows to the storage type, with per-row scales for int8"""
+        if self.scales is None:
+            return vectors.astype(self.matrix.dtype), None
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        return np.rint(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def write(self, row: int, vector: np.ndarray, encoded: np.ndarray, scale: Optional[float]):
+        self.matrix[row] = encoded
+        if self.scales is not None:
+            self.scales[row] = scale
+        if self.full is not None:
+            self.full[row] = vector
+
+    def move(self, source: int, target: int):
+        self.matrix[target] = self.matrix[source]
+        if self.scales is not None:
+            self.scales[target] = self.scales[source]
+        if self.full is not None:
+            self.full[target] = self.full[source]
+
+    def vectors(self, rows) -> np.ndarray:
+        """float32 vectors for rows, exact when available and dequantized otherwise"""
+        if self.full is not None:
+            return self.full[rows]
+        vectors = self.matrix[rows].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[rows][:, None]
+        return vectors
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None,
+               block_size: int = 65536) -> np.ndarray:
+        """Approximate cosine scores from the scan matrix for the given rows (all rows if None)"""
+        if self.matrix.dtype == np.float32:
+            return (self.matrix[:self.size] if rows is None else self.matrix[rows]) @ query
+
+        # Upcast in blocks so a scan never materializes a full float32 copy
+        count = self.size if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, block_size):
+            stop = min(count, start + block_size)
+            block = self.matrix[start:stop] if rows is None else self.matrix[rows[start:stop]]
+            scores[start:stop] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales[:self.size] if rows is None else self.scales[rows]
+        return scores
+
+    def materialize(self):
+        """Turn a namespace loaded from a snapshot into ordinary mutable state.
+
+        Mapped namespaces answer queries as they are; the first write pays
+        for decoding ids, metadata and postings and for a private copy of the
+        vectors.
+        """
+        if self._mapped_postings is None:
+            return
+        self.ids = list(self.ids)
+        self.metadata = list(self.metadata)
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self.postings = {}
+        for (key, item), rows in self._mapped_postings.items():
+            self.postings.setdefault(key, {})[item] = set(rows.tolist())
+        self._mapped_postings = None
+        self.matrix = np.array(self.matrix)
+        if self.scales is not None:
+            self.scales = np.array(self.scales)
+        if self.full is not None:
+            full = self._disk_array(max(1024, self.size), self.full.shape[1])
+            full[:self.size] = self.full[:self.size]
+            self.full = full
+
+    def save(self, directory: str):
+        """Write live rows, ids, metadata, postings and the IVF state to a snapshot directory"""
+        os.makedirs(directory)
+        np.save(os.path.join(directory, "matrix.npy"), self.matrix[:self.size])
+        if self.scales is not None:
+            np.save(os.path.join(directory, "scales.npy"), self.scales[:self.size])
+        if self.full is not None:
+            np.save(os.path.join(directory, "full.npy"), self.full[:self.size])
+        write_strings(os.path.join(directory, "ids"), self.ids)
+        write_records(os.path.join(directory, "metadata"), self.metadata)
+
+        if self._mapped_postings is not None:
+            postings = self._mapped_postings
+        else:
+            postings = {
+                (key, item): self.posting_array(key, item)
+                for key, values in self.postings.items()
+                for item in values
+            }
+        index = []
+        offset = 0
+        for (key, item), rows in postings.items():
+            index.append([key, item, offset, offset + len(rows)])
+            offset += len(rows)
+        arrays = list(postings.values())
+        np.save(
+            os.path.join(directory, "postings.npy"),
+            np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+        )
+        with open(os.path.join(directory, "postings.json"), "w") as handle:
+            json.dump(index, handle)
+
+        if self.ann is not None:
+            self.ann.save(directory)
+
+    def load(self, directory: str):
+        """Map a snapshot written by save(); nothing is decoded until it is used"""
+        self.matrix = load_array(os.path.join(directory, "matrix.npy"), mode="c")
+        if self.scales is not None:
+            self.scales = load_array(os.path.join(directory, "scales.npy"), mode="c")
+        if self.full is not None:
+            self.full = load_array(os.path.join(directory, "full.npy"), mode="c")
+        self.ids = MappedStrings(os.path.join(directory, "ids"))
+        self.metadata = MappedRecords(os.path.join(directory, "metadata"))
+        self.rows = {}
+
+        postings = load_array(os.path.join(directory, "postings.npy"))
+        with open(os.path.join(directory, "postings.json")) as handle:
+            self._mapped_postings = {
+                (key, item): postings[start:stop]
+                for key, item, start, stop in json.load(handle)
+            }
+        self.postings = {}
+        self._posting_arrays = {}
+
+        if self.ann is not None:
+            self.ann.load(directory)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held by live rows: the in-memory scan matrix and the on-disk rescoring copy"""
+        scan = self.size * self.matrix.shape[1] * self.matrix.itemsize
+        if self.scales is not None:
+            scan += self.size * self.scales.itemsize
+        full = self.size * self.full.shape[1] * self.full.itemsize if self.full is not None else 0
+        return {"scan_bytes": scan, "rescore_disk_bytes": full, "float32_bytes": self.size * self.matrix.shape[1] * 4}
+
+    def index_metadata(self, row: int, metadata: Dict[str, Any]):
+        for key, value in metadata.items():
+            if key in UNINDEXED_METADATA_KEYS:
+                continue
+            for item in _indexable_values(value):
+                self.postings.setdefault(key, {}).setdefault(item, set()).add(row)
+                self._posting_arrays.pop((key, item), None)
+
+    def unindex_metadata(self, row: int, metadata: Dict[str, Any]):
+        for key, value in metadata.items():
+            if key in UNINDEXED_METADATA_KEYS:
+                continue
+            values = self.postings.get(key, {})
+            for item in _indexable_values(value):
+                rows = values.get(item)
+                if rows is not None:
+                    rows.discard(row)
+                    self._posting_arrays.pop((key, item), None)
+                    if not rows:
+                        del values[item]
+
+    def posting_array(self, key: str, item: Any) -> np.ndarray:
+        if self._mapped_postings is not None:
+            return self._mapped_postings.get((key, item), np.empty(0, dtype=np.int64))
+        cached = self._posting_arrays.get((key, item))
+        if cached is None:
+            rows = self.postings.get(key, {}).get(item, ())
+            cached = np.fromiter(rows, dtype=np.int64, count=len(rows))
+            cached.sort()
+            self._posting_arrays[(key, item)] = cached
+        return cached
+
+    def matching_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Rows satisfying every filter, resolved from the inverted index"""
+        per_key = []
+        for key, condition in filters.items():
+            arrays = [self.posting_array(key, item) for item in filter_values(condition)]
+            if not arrays:
+                return np.empty(0, dtype=np.int64)
+            rows = arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+            if len(rows) == 0:
+                return rows
+            per_key.append(rows)
+
+        # Intersect starting from the most selective key
+        per_key.sort(key=len)
+        matched = per_key[0]
+        for rows in per_key[1:]:
+            matched = np.intersect1d(matched, rows, assume_unique=True)
+        return matched
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store using contiguous float32 matrices per namespace.
+
+    Rows are L2-normalized on insert so cosine similarity is a single
+    matrix-vector product, and top-k selection uses argpartition. With
+    index_mode="ivf" each namespace also maintains an IVF index once it
+    reaches `ivf_train_threshold` vectors, and queries only score the rows
+    in the `ivf_nprobe` closest lists.
+
+    storage_dtype="float16" or "int8" keeps the scan matrix at 1/2 or 1/4
+    of the float32 size. With rescore enabled a float32 copy is written to
+    memory-mapped files under `rescore_directory` (the system temp
+    directory by default), and the top `top_k * rescore_multiplier`
+    approximate candidates are re-ranked with exact scores read from it.
+    """
+
+    def __init__(self, dimension: int, index_mode: str = "exact", ivf_nlist: int = 256,
+                 ivf_nprobe: int = 16, ivf_train_threshold: int = 10000,
+                 storage_dtype: str = "float32", rescore: bool = False, rescore_multiplier: int = 4,
+                 rescore_directory: Optional[str] = None):
+        if index_mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown index mode: {index_mode}")
+        if storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype: {storage_dtype}")
+        self.dimension = dimension
+        self.index_mode = index_mode
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.ivf_train_threshold = ivf_train_threshold
+        self.storage_dtype = storage_dtype
+        self.rescore = rescore and storage_dtype != "float32"
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self._full_directory = None
+        if self.rescore:
+            if rescore_directory:
+                os.makedirs(rescore_directory, exist_ok=True)
+            self._full_directory = tempfile.mkdtemp(prefix="rescore-", dir=rescore_directory or None)
+        self._namespaces: Dict[str, _LocalNamespace] = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, namespace: Optional[str], create: bool = False) -> Optional[_LocalNamespace]:
+        key = namespace or ""
+        ns = self._namespaces.get(key)
+        if ns is None and create:
+            ann = None
+            if self.index_mode == "ivf":
+                ann = IVFIndex(
+                    nlist=self.ivf_nlist,
+                    nprobe=self.ivf_nprobe,
+                    train_threshold=self.ivf_train_threshold
+                )
+            ns = self._namespaces[key] = _LocalNamespace(
+                self.dimension, ann=ann, storage_dtype=self.storage_dtype, full_directory=self._full_directory
+            )
+        return ns
+
+    def _normalize(self, values) -> np.ndarray:
+        array = np.asarray(values, dtype=np.float32)
+        if array.shape[-1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {array.shape[-1]}")
+        norms = np.linalg.norm(array, axis=-1, keepdims=True)
+        return array / np.maximum(norms, 1e-12)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None):
+        if not vectors:
+            return
+
+        normalized = self._normalize([vector["values"] for vector in vectors])
+        with self._lock:
+            ns = self._namespace(namespace, create=True)
+            ns.materialize()
+            encoded, scales = ns.encode(normalized)
+            ns.reserve(ns.size + len(vectors))
+            written = []
+            for index, vector in enumerate(vectors):
+                row = ns.rows.get(vector["id"])
+                metadata = dict(vector.get("metadata") or {})
+                if row is None:
+                    row = ns.size
+                    ns.rows[vector["id"]] = row
+                    ns.ids.append(vector["id"])
+                    ns.metadata.append(metadata)
+                else:
+                    ns.unindex_metadata(row, ns.metadata[row])
+                    ns.metadata[row] = metadata
+                ns.index_metadata(row, metadata)
+                ns.write(row, normalized[index], encoded[index], scales[index] if scales is not None else None)
+                written.append(row)
+
+            if ns.ann is not None:
+                if ns.ann.needs_training(ns.size):
+                    ns.ann.train(ns.vectors(np.arange(ns.size)))
+                else:
+                    ns.ann.add(written, ns.vectors(written))
+
+    def _search(self, ns: _LocalNamespace, query: np.ndarray, top_k: int, exact: bool = False,
+                nprobe: Optional[int] = None, allowed: Optional[np.ndarray] = None,
+                rescore: Optional[bool] = None) -> List[tuple]:
+        """Top-k (row, score) pairs, using the IVF lists unless exact is requested.
+
+        `allowed` restricts the search to the given rows (a pre-filtered subset).
+        """
+        use_ann = ns.ann is not None and ns.ann.trained and not exact
+        if use_ann and allowed is not None:
+            # A selective filter is cheaper to scan exactly than to probe IVF lists
+            expected_probe = (nprobe or ns.ann.nprobe) * ns.size / max(1, len(ns.ann.lists))
+            use_ann = len(allowed) > expected_probe
+
+        if use_ann:
+            rows = ns.ann.candidates(query, nprobe)
+            if allowed is not None:
+                bitmap = np.zeros(ns.size, dtype=bool)
+                bitmap[allowed] = True
+                rows = rows[bitmap[rows]]
+        elif allowed is not None:
+            rows = allowed
+        else:
+            rows = None
+        scores = ns.scores(query, rows)
+
+        if len(scores) == 0:
+            return []
+
+        rescore = (self.rescore if rescore is None else rescore) and ns.full is not None
+        ranked = self._top(scores, top_k * self.rescore_multiplier if rescore else top_k)
+        if rows is not None:
+            ranked_rows, ranked_scores = rows[ranked], scores[ranked]
+        else:
+            ranked_rows, ranked_scores = ranked, scores[ranked]
+
+        if rescore:
+            exact_scores = ns.full[ranked_rows] @ query
+            reranked = self._top(exact_scores, top_k)
+            ranked_rows, ranked_scores = ranked_rows[reranked], exact_scores[reranked]
+
+        return list(zip(ranked_rows.tolist(), ranked_scores.tolist()))
+
+    def _top(self, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the top_k scores, best first"""
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def query(self, vector: List[float], top_k: int, namespace: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None) -> List[VectorMatch]:
+        query = self._normalize(vector)
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None or ns.size == 0 or top_k <= 0:
+                return []
+
+            allowed = ns.matching_rows(filters) if filters else None
+            return [
+                VectorMatch(id=ns.ids[row], score=float(score), metadata=dict(ns.metadata[row]))
+                for row, score in self._search(ns, query, top_k, allowed=allowed)
+            ]
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None):
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None:
+                return
+            ns.materialize()
+            for vector_id in ids:
+                row = ns.rows.pop(vector_id, None)
+                if row is None:
+                    continue
+                if ns.ann is not None:
+                    ns.ann.remove(row)
+                ns.unindex_metadata(row, ns.metadata[row])
+                # Move the last row into the hole to keep the matrix contiguous
+                last = ns.size - 1
+                if row != last:
+                    ns.unindex_metadata(last, ns.metadata[last])
+                    ns.index_metadata(row, ns.metadata[last])
+                    ns.move(last, row)
+                    ns.ids[row] = ns.ids[last]
+                    ns.metadata[row] = ns.metadata[last]
+                    ns.rows[ns.ids[row]] = row
+                    if ns.ann is not None:
+                        ns.ann.move(last, row)
+                ns.ids.pop()
+                ns.metadata.pop()
+
+    def count(self, namespace: Optional[str] = None) -> int:
+        """Number of vectors stored in a namespace"""
+        with self._lock:
+            ns = self._namespace(namespace)
+            return ns.size if ns else 0
+
+    def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        with self._lock:
+            ns = self._namespace(namespace)
+            return [vector_id for vector_id in ns.ids if vector_id.startswith(prefix)] if ns else []
+
+    def save_snapshot(self, directory: str):
+        """Write every namespace to `directory` in a form load_snapshot() can memory-map"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            namespaces = []
+            for position, (name, ns) in enumerate(self._namespaces.items()):
+                if ns.size == 0:
+                    continue
+                ns.save(os.path.join(directory, f"ns-{position}"))
+                namespaces.append({"name": name, "path": f"ns-{position}", "size": ns.size})
+            with open(os.path.join(directory, "store.json"), "w") as handle:
+                json.dump({
+                    "dimension": self.dimension,
+                    "index_mode": self.index_mode,
+                    "storage_dtype": self.storage_dtype,
+                    "rescore": self.rescore,
+                    "namespaces": namespaces
+                }, handle)
+
+    def load_snapshot(self, directory: str) -> bool:
+        """Map a snapshot written with the same configuration, replacing current contents.
+
+        Returns False, leaving the store untouched, when the snapshot was
+        written with a different dimension, index mode or storage layout.
+        """
+        try:
+            with open(os.path.join(directory, "store.json")) as handle:
+                layout = json.load(handle)
+        except FileNotFoundError:
+            return False
+        expected = {
+            "dimension": self.dimension,
+            "index_mode": self.index_mode,
+            "storage_dtype": self.storage_dtype,
+            "rescore": self.rescore
+        }
+        if any(layout[key] != value for key, value in expected.items()):
+            return False
+
+        with self._lock:
+            self._namespaces = {}
+            for entry in layout["namespaces"]:
+                ns = self._namespace(entry["name"], create=True)
+                ns.load(os.path.join(directory, entry["path"]))
+        return True
+
+    def memory_usage(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Vector memory of a namespace (all namespaces if None) against a float32 baseline"""
+        with self._lock:
+            if namespace is None:
+                namespaces = list(self._namespaces.values())
+            else:
+                ns = self._namespace(namespace)
+                namespaces = [ns] if ns else []
+            usage = {"scan_bytes": 0, "rescore_disk_bytes": 0, "float32_bytes": 0}
+            for ns in namespaces:
+                for key, value in ns.memory_usage().items():
+                    usage[key] += value
+        usage["storage_dtype"] = self.storage_dtype
+        usage["rescore"] = self.rescore
+        return usage
+
+    def close(self):
+        """Remove the rescoring files; mapped rows stay readable until released"""
+        if self._full_directory is not None:
+            shutil.rmtree(self._full_directory, ignore_errors=True)
+
+    def recall_report(self, queries: List[List[float]], top_k: int = 10,
+                      nprobe_values: Optional[List[int]] = None,
+                      namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Measure ANN recall@k and latency against exact search for each nprobe setting"""
+        queries = self._normalize(queries)
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None or ns.size == 0:
+                return {"size": 0, "exact": None, "ivf": []}
+
+            def timed(**kwargs):
+                latencies = []
+                results = []
+                for query in queries:
+                    start = time.perf_counter()
+                    results.append({row for row, _ in self._search(ns, query, top_k, **kwargs)})
+                    latencies.append((time.perf_counter() - start) * 1000)
+                return results, latencies
+
+            def latency_stats(latencies: List[float]) -> Dict[str, float]:
+                return {
+                    "mean_ms": float(np.mean(latencies)),
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99))
+                }
+
+            exact_results, exact_latencies = timed(exact=True)
+            report = {"size": ns.size, "top_k": top_k, "exact": latency_stats(exact_latencies), "ivf": []}
+
+            if ns.ann is None or not ns.ann.trained:
+                return report
+
+            for nprobe in nprobe_values or [1, 2, 4, 8, 16, 32, 64]:
+                ann_results, ann_latencies = timed(nprobe=nprobe)
+                recall = np.mean([
+                    len(found & expected) / max(1, len(expected))
+                    for found, expected in zip(ann_results, exact_results)
+                ])
+                report["ivf"].append({"nprobe": nprobe, "recall": float(recall), **latency_stats(ann_latencies)})
+
+            return report
+
+
+def quantization_benchmark(vectors: List[List[float]], queries: List[List[float]], top_k: int = 10,
+                           storage_dtypes: Optional[List[str]] = None,
+                           rescore_multiplier: int = 4) -> Dict[str, Any]:
+    """Compare memory, recall@k and latency of each storage dtype against exact float32 search.
+
+    Every dtype is measured with and without rescoring; recall is the
+    overlap with the float32 top_k. memory_saved counts in-memory bytes
+    only, since the rescoring copy is on disk.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    dimension = vectors.shape[1]
+    records = [{"id": str(row), "values": values} for row, values in enumerate(vectors)]
+
+    def run(store: LocalVectorStore, rescore: bool):
+        ns = store._namespace(None)
+        results = []
+        latencies = []
+        for query in store._normalize(queries):
+            start = time.perf_counter()
+            results.append({row for row, _ in store._search(ns, query, top_k, exact=True, rescore=rescore)})
+            latencies.append((time.perf_counter() - start) * 1000)
+        return results, latencies
+
+    baseline = LocalVectorStore(dimension)
+    baseline.upsert(records)
+    expected, baseline_latencies = run(baseline, False)
+    report = {
+        "size": len(records),
+        "dimension": dimension,
+        "top_k": top_k,
+        "float32_bytes": baseline.memory_usage()["float32_bytes"],
+        "float32_mean_ms": float(np.mean(baseline_latencies)),
+        "dtypes": []
+    }
+
+    for storage_dtype in storage_dtypes or ["float16", "int8"]:
+        store = LocalVectorStore(
+            dimension, storage_dtype=storage_dtype, rescore=True, rescore_multiplier=rescore_multiplier
+        )
+        store.upsert(records)
+        usage = store.memory_usage()
+        for rescore in (False, True):
+            found, latencies = run(store, rescore)
+            recall = np.mean([len(a & b) / max(1, len(b)) for a, b in zip(found, expected)])
+            report["dtypes"].append({
+                "storage_dtype": storage_dtype,
+                "rescore": rescore,
+                "recall": float(recall),
+                "scan_bytes": usage["scan_bytes"],
+                "rescore_disk_bytes": usage["rescore_disk_bytes"] if rescore else 0,
+                "memory_saved": 1 - usage["scan_bytes"] / max(1, report["float32_bytes"]),
+                "mean_ms": float(np.mean(latencies))
+            })
+        store.close()
+    return report
@@ -2,6 +2,9 @@
 Mistral AI-powered FastAPI application for technology stack recommendations
 """
 import os
+import time
+import asyncio
+from collections import deque
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,6 +25,14 @@ except ImportError as e:
     print(f"Mistral import failed: {e}")
     mistral_client = None
 
+# Mistral call limits: concurrent requests, per-call timeout, and the latency
+# percentile after which a hedged duplicate request is sent (0 disables hedging)
+MISTRAL_MAX_CONCURRENCY = int(os.getenv("MISTRAL_MAX_CONCURRENCY", "8"))
+MISTRAL_TIMEOUT_SECONDS = float(os.getenv("MISTRAL_TIMEOUT_SECONDS", "30"))
+MISTRAL_HEDGE_PERCENTILE = float(os.getenv("MISTRAL_HEDGE_PERCENTILE", "0"))
+mistral_semaphore = asyncio.Semaphore(MISTRAL_MAX_CONCURRENCY)
+mistral_latencies = deque(maxlen=200)
+
 app = FastAPI(
     title="AI Stack Recommendation API",
     description="AI-powered technology stack recommendations",
@@ -133,6 +144,69 @@ async def get_tech_recommendations(project_type: str, requirements: List[str],
     
     return recommendations
 
+def mistral_hedge_delay() -> Optional[float]:
+    """Seconds to wait before hedging, from recent call latencies; None when hedging is off"""
+    if MISTRAL_HEDGE_PERCENTILE <= 0 or len(mistral_latencies) < 20:
+        return None
+    latencies = sorted(mistral_latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * MISTRAL_HEDGE_PERCENTILE / 100))]
+
+async def complete_mistral(messages: List[Dict[str, str]]) -> str:
+    """Run a Mistral chat completion without blocking the event loop.
+    
+    Calls are bounded by MISTRAL_MAX_CONCURRENCY and MISTRAL_TIMEOUT_SECONDS. With
+    hedging on, a call that has held a slot for longer than the hedge delay gets
+    a duplicate request if a slot is free; the first successful answer wins and
+    the other is cancelled.
+    """
+    async def attempt(started: asyncio.Event) -> str:
+        async with mistral_semaphore:
+            started.set()
+            began = time.perf_counter()
+            response = await mistral_client.chat.complete_async(
+                model="mistral-large-latest",
+                messages=messages,
+                temperature=0.3,
+                max_tokens=1000
+            )
+            mistral_latencies.append(time.perf_counter() - began)
+            return response.choices[0].message.content
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MISTRAL_TIMEOUT_SECONDS
+    hedge_delay = mistral_hedge_delay()
+    started = asyncio.Event()
+    primary = asyncio.ensure_future(attempt(started))
+    pending = {primary}
+    error = None
+    try:
+        if hedge_delay is not None:
+            # The hedge clock starts once the call holds a slot, not while it queues for one
+            waiter = asyncio.ensure_future(started.wait())
+            await asyncio.wait({primary, waiter}, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if started.is_set() and not primary.done() and loop.time() + hedge_delay < deadline:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                # With every slot busy a hedge would only queue behind the overload
+                if not done and not mistral_semaphore.locked():
+                    pending.add(asyncio.ensure_future(attempt(asyncio.Event())))
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Count the timeout so the hedge percentile reflects slow calls too
+                mistral_latencies.append(MISTRAL_TIMEOUT_SECONDS)
+                raise asyncio.TimeoutError(f"Mistral did not respond within {MISTRAL_TIMEOUT_SECONDS}s")
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                return succeeded[0].result()
+            error = next(iter(done)).exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
 async def get_mistral_recommendations(project_type: str, requirements: List[str], 
                                    experience_level: str) -> Optional[Dict[str, TechnologyRecommendation]]:
     """Get AI-powered recommendations using Mistral AI"""
@@ -168,15 +242,8 @@ Respond in a structured format that I can parse."""
             {"role": "user", "content": prompt}
         ]
         
-        response = mistral_client.chat.complete(
-            model="mistral-large-latest",
-            messages=messages,
-            temperature=0.3,
-            max_tokens=1000
-        )
-        
         # Parse Mistral response and convert to our format
-        content = response.choices[0].message.content
+        content = await complete_mistral(messages)
         return parse_mistral_response(content)
         
     except Exception as e: